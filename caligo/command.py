@@ -1,5 +1,4 @@
 import asyncio
-from datetime import datetime
 from typing import (
     TYPE_CHECKING,
     Any,
@@ -115,13 +114,12 @@ class Context:
     cmd_len: int
     invoker: str
 
-    last_update_time: Optional[datetime]
-
     response: Message
     response_mode: Optional[str]
 
     input: str
     args: Sequence[str]
+    flags: Dict[str, Any]
 
     def __init__(
         self,
@@ -137,9 +135,6 @@ class Context:
         self.segments = message.command
         self.cmd_len = cmd_len
         self.invoker = self.segments[0]
-        self.flags = self._parse_flags()
-
-        self.last_update_time = None
 
         self.response = None  # type: ignore
         self.response_mode = None
@@ -150,6 +145,10 @@ class Context:
         if name == "args":
             return self._get_args()
 
+        if name == "flags":
+            self.flags = self._parse_flags()
+            return self.flags
+
         raise AttributeError(
             f"'{type(self).__name__}' object has no attribute '{name}'"
         )
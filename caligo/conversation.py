@@ -1,5 +1,7 @@
 import asyncio
-from typing import TYPE_CHECKING, Any, Optional, Union
+import inspect
+from collections import deque
+from typing import TYPE_CHECKING, Any, Deque, List, Optional, Tuple, Union
 
 import pyrogram
 from pyrogram.filters import Filter
@@ -11,15 +13,117 @@ if TYPE_CHECKING:
     from .core import Caligo
 
 
-class ConversationExistError(Exception):
-    def __init__(self, msg: Optional[str] = None):
-        self.msg = msg
-        super().__init__(self.msg)
+async def _match(client: pyrogram.Client, filters: Filter, msg: Message) -> bool:
+    if inspect.iscoroutinefunction(filters.__call__):
+        return await filters(client, msg)
+
+    return await util.run_sync(filters, client, msg)
+
+
+class ChatInbox:
+    """Incoming messages of one chat, shared by all of its conversations.
+
+    Each message goes to the earliest pending read whose filter matches it, so
+    concurrent conversations never receive the same message. Messages nobody
+    is waiting for are buffered, up to the combined max_messages of the chat's
+    conversations, until a read takes them. Buffered messages are always
+    served first; only a read finding none after messages had to be dropped
+    fails, as the message it waits for may be gone.
+    """
+
+    client: pyrogram.Client
+    conversations: List["Conversation"]
+
+    _pending: Deque[Message]
+    _waiters: List[Tuple["Conversation", Optional[Filter], "asyncio.Future[Message]"]]
+    _dropped: int
+    _lock: asyncio.Lock
+
+    def __init__(self, client: pyrogram.Client) -> None:
+        self.client = client
+        self.conversations = []
+
+        self._pending = deque()
+        self._waiters = []
+        self._dropped = 0
+        self._lock = asyncio.Lock()
+
+    @property
+    def capacity(self) -> int:
+        return sum(conv.max_messages for conv in self.conversations)
+
+    def attach(self, conv: "Conversation") -> None:
+        self.conversations.append(conv)
+        conv.inbox = self
+
+    def detach(self, conv: "Conversation") -> None:
+        self.conversations.remove(conv)
+        for entry in tuple(self._waiters):
+            if entry[0] is conv:
+                entry[2].cancel()
+
+    async def feed(self, msg: Message) -> None:
+        # Serialized with reads, so a message is either handed over or buffered
+        async with self._lock:
+            for _, filters, waiter in tuple(self._waiters):
+                if waiter.done():
+                    continue
+
+                if filters is not None and not await _match(self.client, filters, msg):
+                    continue
+
+                if not waiter.done():
+                    waiter.set_result(msg)
+                    return
+
+            if len(self._pending) >= self.capacity:
+                self._dropped += 1
+            else:
+                self._pending.append(msg)
+
+    async def get(
+        self, conv: "Conversation", filters: Optional[Filter], timeout: float
+    ) -> Message:
+        async with self._lock:
+            for msg in tuple(self._pending):
+                if filters is None or await _match(self.client, filters, msg):
+                    self._pending.remove(msg)
+                    return msg
+
+            if self._dropped:
+                # Reported once, later reads wait for new messages again
+                self._dropped = 0
+                raise ValueError("Received more messages than can be buffered")
+
+            waiter: "asyncio.Future[Message]" = (
+                asyncio.get_running_loop().create_future()
+            )
+            entry = (conv, filters, waiter)
+            self._waiters.append(entry)
+
+        try:
+            return await asyncio.wait_for(waiter, timeout)
+        except BaseException:
+            # Handed over just as the read gave up, keep it for the next one
+            if waiter.done() and not waiter.cancelled():
+                self._pending.appendleft(waiter.result())
+
+            raise
+        finally:
+            self._waiters.remove(entry)
 
 
 class Conversation:
+    """Exchange of messages with a single chat.
+
+    Responses are read from the inbox of the chat, which may be shared with
+    other conversations running at the same time.
+    """
+
     _chat: Any
 
+    inbox: Optional[ChatInbox]
+
     def __init__(
         self,
         bot: "Caligo",
@@ -35,6 +139,8 @@ class Conversation:
         self._max_incoming = max_messages
         self._timeout = timeout
 
+        self.inbox = None
+
     @classmethod
     async def new(
         cls, bot: "Caligo", input_chat: Union[str, int], timeout: int, max_messages: int
@@ -72,25 +178,21 @@ class Conversation:
     async def mark_read(self, max_id: int = 0) -> bool:
         return await self.bot.client.read_chat_history(self.chat.id, max_id)
 
+    @property
+    def max_messages(self) -> int:
+        return self._max_incoming
+
     async def _get_message(self, **kwargs: Any) -> Message:
         if self._counter >= self._max_incoming:
             raise ValueError("Received max messages")
 
+        if self.inbox is None:
+            raise RuntimeError("Conversation isn't attached to a chat inbox")
+
         filters: Optional[Filter] = kwargs.get("filters")
-        fut = self.bot.CONVERSATION[self.chat.id]
         timeout = kwargs.get("timeout") or self._timeout
-        before = util.time.usec()
-        while True:
-            after = before - util.time.usec()
-            result = await asyncio.wait_for(fut.get(), timeout - after)
-
-            if filters is not None:
-                ready: bool = await filters(self.bot.client, result)
-                if not ready:
-                    continue
-
-            break
 
+        response = await self.inbox.get(self, filters, timeout)
         self._counter += 1
 
-        return result
+        return response
@@ -5,11 +5,14 @@ from typing import Any, Mapping, Optional
 import aiohttp
 from pyrogram.client import Client
 
+from caligo.util.perf import PerfRegistry
+
 from .command_dispatcher import CommandDispatcher
 from .conversation_dispatcher import ConversationDispatcher
 from .database_provider import DatabaseProvider
 from .event_dispatcher import EventDispatcher
 from .module_extender import ModuleExtender
+from .overflow_handler import OverflowHandler
 from .telegram_bot import TelegramBot
 
 
@@ -19,6 +22,7 @@ class Caligo(
     DatabaseProvider,
     EventDispatcher,
     ConversationDispatcher,
+    OverflowHandler,
     ModuleExtender,
 ):
     config: Mapping[str, Any]
@@ -27,12 +31,14 @@ class Caligo(
     lock: asyncio.Lock
     log: logging.Logger
     loop: asyncio.AbstractEventLoop
+    perf: PerfRegistry
     stopping: bool
 
     def __init__(self, config: Mapping[str, Any]) -> None:
         self.config = config
         self.log = logging.getLogger("Bot")
         self.loop = asyncio.get_event_loop()
+        self.perf = PerfRegistry()
         self.stopping = False
 
         super().__init__()
@@ -70,9 +76,11 @@ class Caligo(
             if self.helper_initialized and self.client_helper.is_connected:
                 await self.client_helper.stop()
 
-        await self.db.close()
+        await self.close_db()
         await self.http.close()
 
         self.log.info("Running post-stop hooks")
         if self.loaded:
             await self.dispatch_event("stopped")
+
+        await self.scheduler.close()
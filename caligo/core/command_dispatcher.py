@@ -1,9 +1,11 @@
 import inspect
-from typing import TYPE_CHECKING, Any, Iterable, MutableMapping, Optional
+import re
+from types import MappingProxyType
+from typing import TYPE_CHECKING, Any, Iterable, Mapping, MutableMapping, Optional
 
 from pyrogram.client import Client
 from pyrogram.errors import MessageNotModified
-from pyrogram.filters import Filter, create
+from pyrogram.filters import Filter
 from pyrogram.types import Message
 
 from caligo import command, module, util
@@ -13,15 +15,37 @@ from .base import CaligoBase
 if TYPE_CHECKING:
     from .bot import Caligo
 
+LEADING_TOKEN = re.compile(r"\S+")
+
 
 class CommandDispatcher(CaligoBase):
     commands: MutableMapping[str, command.Command]
+    # Frozen lookup of prefix + command/alias name, rebuilt on every change
+    command_index: Mapping[str, command.Command]
+
+    _prefix: str
 
     def __init__(self: "Caligo", **kwargs: Any) -> None:
         self.commands = {}
+        self.command_index = MappingProxyType({})
+        self._prefix = ""
 
         super().__init__(**kwargs)
 
+    @property
+    def prefix(self: "Caligo") -> str:
+        return self._prefix
+
+    @prefix.setter
+    def prefix(self: "Caligo", value: str) -> None:
+        self._prefix = value
+        self.build_command_index()
+
+    def build_command_index(self: "Caligo") -> None:
+        self.command_index = MappingProxyType(
+            {self.prefix + name: cmd for name, cmd in self.commands.items()}
+        )
+
     def register_command(
         self: "Caligo",
         mod: module.Module,
@@ -61,6 +85,8 @@ class CommandDispatcher(CaligoBase):
 
             self.commands[alias] = cmd
 
+        self.build_command_index()
+
     def unregister_command(self: "Caligo", cmd: command.Command) -> None:
         del self.commands[cmd.name]
 
@@ -70,6 +96,8 @@ class CommandDispatcher(CaligoBase):
             except KeyError:
                 continue
 
+        self.build_command_index()
+
     def register_commands(self: "Caligo", mod: module.Module) -> None:
         for name, func in util.misc.find_prefixed_funcs(mod, "cmd_"):
             done = False
@@ -104,39 +132,39 @@ class CommandDispatcher(CaligoBase):
         for cmd in to_unreg:
             self.unregister_command(cmd)
 
-    def command_predicate(self: "Caligo") -> Filter:
-        async def func(_: Filter, client: Client, message: Message) -> bool:
-            if message.via_bot:
-                return False
-
-            if message.text is not None and message.text.startswith(self.prefix):
-                parts = message.text.split()
-                parts[0] = parts[0][len(self.prefix) :]  # Remove prefix
-
-                # Filter if command is not in commands
-                try:
-                    cmd = self.commands[parts[0]]
-                except KeyError:
-                    return False
-
-                # Check additional built-in filters
-                if cmd.filters:
-                    if inspect.iscoroutinefunction(cmd.filters.__call__):
-                        if not await cmd.filters(client, message):
-                            return False
-                    else:
-                        if not await util.run_sync(cmd.filters, client, message):
-                            return False
+    async def match_command(self: "Caligo", client: Client, message: Message) -> bool:
+        if message.via_bot or message.text is None:
+            return False
 
-                message.command = parts
-                return True
+        # Only look at the leading token, the rest is split after a match
+        token = LEADING_TOKEN.match(message.text)
+        if token is None:
+            return False
 
+        # Filter if command is not in commands
+        try:
+            cmd = self.command_index[token.group()]
+        except KeyError:
             return False
 
-        return create(func, "CustomCommandFilter")
+        # Check additional built-in filters
+        if cmd.filters:
+            if inspect.iscoroutinefunction(cmd.filters.__call__):
+                if not await cmd.filters(client, message):
+                    return False
+            else:
+                if not await util.run_sync(cmd.filters, client, message):
+                    return False
+
+        message.command = [token.group()[len(self.prefix) :]]
+        return True
 
     async def on_command(self: "Caligo", _: Client, message: Message) -> None:
         cmd = self.commands[message.command[0]]
+        # Split arguments now that the command is known
+        message.command.extend(
+            message.text[len(self.prefix) + len(message.command[0]) :].split()
+        )
         try:
             # Construct invocation context
             ctx = command.Context(
@@ -146,9 +174,10 @@ class CommandDispatcher(CaligoBase):
             )
 
             try:
-                ret = await cmd.func(ctx)
-                if ret is not None:
-                    await ctx.respond(ret)
+                with self.perf.measure("command", cmd.module.name, cmd.name):
+                    ret = await cmd.func(ctx)
+                    if ret is not None:
+                        await ctx.respond(ret)
             except MessageNotModified:
                 cmd.module.log.warning(
                     f"Command '{cmd.name}' triggered a message edit with no changes"
@@ -170,5 +199,3 @@ class CommandDispatcher(CaligoBase):
                 "⚠️ Error in command handler:\n"
                 f"```{util.error.format_exception(e)}```",
             )
-        finally:
-            message.continue_propagation()
@@ -1,12 +1,9 @@
-import asyncio
 from contextlib import asynccontextmanager
-from typing import TYPE_CHECKING, Any, AsyncGenerator, Dict, Union
+from typing import TYPE_CHECKING, Any, AsyncGenerator, MutableMapping, Union
 
-from pyrogram.client import Client
-from pyrogram.filters import Filter, create
 from pyrogram.types import Message
 
-from caligo.conversation import Conversation, ConversationExistError
+from caligo.conversation import ChatInbox, Conversation
 
 from .base import CaligoBase
 
@@ -15,21 +12,14 @@ if TYPE_CHECKING:
 
 
 class ConversationDispatcher(CaligoBase):
-    CONVERSATION: Dict[int, asyncio.Queue]
+    # Inbox by chat, shared by every conversation running in it
+    conversations: MutableMapping[int, ChatInbox]
 
     def __init__(self: "Caligo", **kwargs: Any) -> None:
-        self.CONVERSATION = {}
+        self.conversations = {}
 
         super().__init__(**kwargs)
 
-    def conversation_predicate(self: "CaligoBase") -> Filter:
-        async def func(_, __, conv: Message):
-            return bool(
-                self.CONVERSATION and conv.chat and conv.chat.id in self.CONVERSATION
-            )
-
-        return create(func)
-
     @asynccontextmanager
     async def conversation(
         self: "Caligo",
@@ -39,21 +29,19 @@ class ConversationDispatcher(CaligoBase):
         max_messages: int = 7,
     ) -> AsyncGenerator[Conversation, None]:
         conv = await Conversation.new(self, chat_id, timeout, max_messages)
-        chat_name = conv.chat.title if conv.chat.title else conv.chat.first_name
-        if conv.chat.id in self.CONVERSATION:
-            raise ConversationExistError(f"Conversation with '{chat_name}' exist")
-
-        self.CONVERSATION[conv.chat.id] = asyncio.Queue(max_messages)
+        inbox = self.conversations.get(conv.chat.id)
+        if inbox is None:
+            inbox = self.conversations[conv.chat.id] = ChatInbox(self.client)
 
+        inbox.attach(conv)
         try:
             yield conv
         finally:
-            self.CONVERSATION[conv.chat.id].put_nowait(None)
-            del self.CONVERSATION[conv.chat.id]
-
-    async def on_conversation(
-        self: "Caligo", client: Client, msg: Message  # skipcq: PYL-W0613
-    ) -> None:
-        cache = self.CONVERSATION[msg.chat.id]
-        cache.put_nowait(msg)
-        msg.continue_propagation()
+            inbox.detach(conv)
+            if not inbox.conversations:
+                del self.conversations[conv.chat.id]
+
+    async def feed_conversation(self: "Caligo", msg: Message) -> None:
+        inbox = self.conversations.get(msg.chat.id)
+        if inbox is not None:
+            await inbox.feed(msg)
@@ -1,6 +1,13 @@
+from .change_stream_consumer import ChangeStreamConsumer  # skipcq: PY-W2000
 from .client import AsyncClient  # skipcq: PY-W2000
 from .collection import AsyncCollection  # skipcq: PY-W2000
 from .cursor import AsyncCursor  # skipcq: PY-W2000
 from .db import AsyncDatabase  # skipcq: PY-W2000
 
-__all__ = ["AsyncClient", "AsyncCollection", "AsyncCursor", "AsyncDatabase"]
+__all__ = [
+    "AsyncClient",
+    "AsyncCollection",
+    "AsyncCursor",
+    "AsyncDatabase",
+    "ChangeStreamConsumer",
+]
@@ -4,10 +4,12 @@ from bson.timestamp import Timestamp
 from pymongo.change_stream import ChangeStream
 from pymongo.collation import Collation
 
-from caligo import util
-
 from .base import AsyncBase
 from .client_session import AsyncClientSession
+from .executor import run_sync
+
+# How long the server holds each getMore open waiting for changes
+DEFAULT_MAX_AWAIT_TIME_MS = 1000
 
 if TYPE_CHECKING:
     from .client import AsyncClient
@@ -47,7 +49,12 @@ class AsyncChangeStream(AsyncBase):
             "pipeline": pipeline,
             "full_document": full_document,
             "resume_after": resume_after,
-            "max_await_time_ms": max_await_time_ms,
+            # Waiting server-side keeps next() from spinning on empty batches
+            "max_await_time_ms": (
+                DEFAULT_MAX_AWAIT_TIME_MS
+                if max_await_time_ms is None
+                else max_await_time_ms
+            ),
             "batch_size": batch_size,
             "collation": collation,
             "start_at_operation_time": start_at_operation_time,
@@ -83,15 +90,13 @@ class AsyncChangeStream(AsyncBase):
 
     async def _init(self) -> ChangeStream:
         if not self.dispatch:
-            self.dispatch = await util.run_sync(
-                self._target.dispatch.watch, **self._options
-            )
+            self.dispatch = await run_sync(self._target.dispatch.watch, **self._options)
 
         return self.dispatch
 
     async def close(self):
         if self.dispatch:
-            await util.run_sync(self.dispatch.close)
+            await run_sync(self.dispatch.close)
 
     async def next(self) -> Mapping[str, Any]:
         while self.alive:
@@ -103,7 +108,7 @@ class AsyncChangeStream(AsyncBase):
 
     async def try_next(self) -> Optional[Mapping[str, Any]]:
         self.dispatch = await self._init()
-        return await util.run_sync(self.dispatch.try_next)
+        return await run_sync(self.dispatch.try_next)
 
     @property
     def alive(self) -> bool:
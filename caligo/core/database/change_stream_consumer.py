@@ -0,0 +1,216 @@
+import asyncio
+import concurrent.futures
+import logging
+import threading
+import time
+from typing import TYPE_CHECKING, Any, List, Literal, Mapping, Optional, Union
+
+from pymongo.change_stream import ChangeStream
+
+from .change_stream import DEFAULT_MAX_AWAIT_TIME_MS
+from .executor import run_sync
+
+if TYPE_CHECKING:
+    from .client import AsyncClient
+    from .collection import AsyncCollection
+    from .db import AsyncDatabase
+
+log = logging.getLogger(__name__)
+
+# Marks the end of the stream in the hand-off queue
+_STREAM_END = object()
+
+
+class ChangeStreamConsumer:
+    """Consumes a change stream from one dedicated thread.
+
+    The thread parks on the blocking next() of the stream and hands events
+    over to the loop through a bounded queue, so an idle stream costs neither
+    CPU nor a database pool thread. Stopping closes the stream to wake it. The resume token of every event the
+    consumer has moved past is persisted, letting a restarted instance pick up
+    where the previous one stopped instead of resyncing from scratch.
+    """
+
+    name: str
+    loop: asyncio.AbstractEventLoop
+
+    _target: Union["AsyncClient", "AsyncDatabase", "AsyncCollection"]
+    _tokens: "AsyncCollection"
+    _options: Mapping[str, Any]
+    _persist_interval: float
+
+    _queue: asyncio.Queue
+    _thread: Optional[threading.Thread]
+    _stream: Optional[ChangeStream]
+    _stopped: threading.Event
+    _finished: asyncio.Event
+    _pending_put: Optional[concurrent.futures.Future]
+
+    _delivered_token: Optional[Mapping[str, Any]]
+    _acked_token: Optional[Mapping[str, Any]]
+    _saved_token: Optional[Mapping[str, Any]]
+    _last_save: float
+
+    def __init__(
+        self,
+        target: Union["AsyncClient", "AsyncDatabase", "AsyncCollection"],
+        name: str,
+        tokens: "AsyncCollection",
+        pipeline: Optional[List[Mapping[str, Any]]] = None,
+        *,
+        full_document: Optional[Literal["updateLookup"]] = None,
+        max_await_time_ms: Optional[int] = DEFAULT_MAX_AWAIT_TIME_MS,
+        queue_size: int = 1024,
+        persist_interval: float = 5,
+    ) -> None:
+        self.name = name
+        self.loop = asyncio.get_event_loop()
+
+        self._target = target
+        self._tokens = tokens
+        self._options = {
+            "pipeline": pipeline,
+            "full_document": full_document,
+            "max_await_time_ms": max_await_time_ms,
+        }
+        self._persist_interval = persist_interval
+
+        self._queue = asyncio.Queue(queue_size)
+        self._thread = None
+        self._stream = None
+        self._stopped = threading.Event()
+        self._finished = asyncio.Event()
+        self._pending_put = None
+
+        self._delivered_token = None
+        self._acked_token = None
+        self._saved_token = None
+        self._last_save = 0.0
+
+    async def __aenter__(self) -> "ChangeStreamConsumer":
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type: Any, exc_val: Any, exc_tb: Any) -> None:
+        await self.stop()
+
+    def __aiter__(self) -> "ChangeStreamConsumer":
+        return self
+
+    async def __anext__(self) -> Mapping[str, Any]:
+        return await self.next()
+
+    def _put(self, item: Any) -> None:
+        if self._stopped.is_set():
+            return
+
+        # Blocks the stream thread while the queue is full
+        self._pending_put = asyncio.run_coroutine_threadsafe(
+            self._queue.put(item), self.loop
+        )
+        try:
+            self._pending_put.result()
+        except concurrent.futures.CancelledError:
+            pass
+        finally:
+            self._pending_put = None
+
+    def _consume(self, resume_after: Optional[Mapping[str, Any]]) -> None:
+        try:
+            with self._target.dispatch.watch(
+                resume_after=resume_after, **self._options
+            ) as stream:
+                # Published before checking the flag so stop() can't miss it
+                self._stream = stream
+                if self._stopped.is_set():
+                    return
+
+                # Blocks until the next change or until stop() closes the stream
+                for change in stream:
+                    self._put(change)
+        except Exception as e:  # skipcq: PYL-W0703
+            if not self._stopped.is_set():
+                self._put(e)
+        finally:
+            self._stream = None
+            self._put(_STREAM_END)
+            self.loop.call_soon_threadsafe(self._finished.set)
+
+    async def start(self) -> None:
+        if self._thread is not None:
+            raise RuntimeError(f"Change stream '{self.name}' is already running")
+
+        data = await self._tokens.find_one({"_id": self.name})
+        self._saved_token = self._acked_token = data["token"] if data else None
+        self._last_save = time.monotonic()
+
+        self._stopped.clear()
+        self._finished.clear()
+        self._thread = threading.Thread(
+            target=self._consume,
+            args=(self._acked_token,),
+            name=f"change_stream_{self.name}",
+            daemon=True,
+        )
+        self._thread.start()
+
+    async def stop(self) -> None:
+        if self._thread is None:
+            return
+
+        # Make sure the thread isn't left blocked on a full queue either
+        self._stopped.set()
+        if self._pending_put is not None:
+            self._pending_put.cancel()
+        while not self._queue.empty():
+            self._queue.get_nowait()
+
+        stream = self._stream
+        if stream is not None:
+            try:
+                await run_sync(stream.close)
+            except Exception as e:  # skipcq: PYL-W0703
+                log.warning("Failed to close change stream '%s'", self.name, exc_info=e)
+
+        await self._finished.wait()
+        self._thread = None
+
+        await self.save_token()
+
+    async def save_token(self) -> None:
+        """Persists the resume token of the last event the consumer moved past."""
+
+        token = self._acked_token
+        if token is None or token == self._saved_token:
+            return
+
+        await self._tokens.update_one(
+            {"_id": self.name}, {"$set": {"token": token}}, upsert=True
+        )
+        self._saved_token = token
+        self._last_save = time.monotonic()
+
+    async def next(self) -> Mapping[str, Any]:
+        # Asking for another event acknowledges the previous one
+        if self._delivered_token is not None:
+            self._acked_token = self._delivered_token
+            if time.monotonic() - self._last_save >= self._persist_interval:
+                try:
+                    await self.save_token()
+                except Exception as e:  # skipcq: PYL-W0703
+                    log.warning(
+                        "Failed to save resume token of '%s'", self.name, exc_info=e
+                    )
+
+        item = await self._queue.get()
+        if item is _STREAM_END:
+            self._thread = None
+            await self.save_token()
+            raise StopAsyncIteration
+
+        if isinstance(item, Exception):
+            self._thread = None
+            raise item
+
+        self._delivered_token = item["_id"]
+        return item
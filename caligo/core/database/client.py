@@ -25,13 +25,12 @@ from pymongo.topology_description import TopologyDescription
 from pymongo.typings import _Address
 from pymongo.write_concern import DEFAULT_WRITE_CONCERN, WriteConcern
 
-from caligo import util
-
 from .base import AsyncBaseProperty
 from .change_stream import AsyncChangeStream
 from .client_session import AsyncClientSession
 from .command_cursor import AsyncCommandCursor, CommandCursor
 from .db import AsyncDatabase
+from .executor import executor, run_sync
 from .typings import ReadPreferences
 
 
@@ -53,6 +52,9 @@ class AsyncClient(AsyncBaseProperty):
         )
         dispatch = MongoClient(*args, **kwargs)
 
+        # One thread per pooled connection, more would just wait on a socket
+        executor.resize(dispatch.options.pool_options.max_pool_size)
+
         # Propagate initialization to base
         super().__init__(dispatch)
 
@@ -63,7 +65,7 @@ class AsyncClient(AsyncBaseProperty):
         return hash(self.address)
 
     async def close(self) -> None:
-        await util.run_sync(self.dispatch.close)
+        await run_sync(self.dispatch.close)
 
     async def drop_database(
         self,
@@ -73,7 +75,7 @@ class AsyncClient(AsyncBaseProperty):
         if isinstance(name_or_database, AsyncDatabase):
             name_or_database = name_or_database.name
 
-        return await util.run_sync(
+        return await run_sync(
             self.dispatch.drop_database,
             name_or_database,
             session=session.dispatch if session else session,
@@ -122,7 +124,7 @@ class AsyncClient(AsyncBaseProperty):
     async def list_database_names(
         self, session: Optional[AsyncClientSession] = None
     ) -> List[str]:
-        return await util.run_sync(
+        return await run_sync(
             self.dispatch.list_database_names,
             session=session.dispatch if session else session,
         )
@@ -138,7 +140,7 @@ class AsyncClient(AsyncBaseProperty):
             read_preference=ReadPreference.PRIMARY,
             write_concern=DEFAULT_WRITE_CONCERN,
         )
-        res: Mapping[str, Any] = await util.run_sync(
+        res: Mapping[str, Any] = await run_sync(
             database.dispatch._retryable_read_command,  # skipcq: PYL-W0212
             cmd,
             session=session.dispatch if session else session,
@@ -153,7 +155,7 @@ class AsyncClient(AsyncBaseProperty):
     async def server_info(
         self, session: Optional[AsyncClientSession] = None
     ) -> Mapping[str, Any]:
-        return await util.run_sync(
+        return await run_sync(
             self.dispatch.server_info, session=session.dispatch if session else session
         )
 
@@ -167,7 +169,7 @@ class AsyncClient(AsyncBaseProperty):
         default_transaction_options: Optional[TransactionOptions] = None,
         snapshot: bool = False,
     ) -> AsyncGenerator[AsyncClientSession, None]:
-        session = await util.run_sync(
+        session = await run_sync(
             self.dispatch.start_session,
             causal_consistency=causal_consistency,
             default_transaction_options=default_transaction_options,
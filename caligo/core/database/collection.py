@@ -27,13 +27,12 @@ from pymongo.results import (
 from pymongo.typings import _DocumentType
 from pymongo.write_concern import WriteConcern
 
-from caligo import util
-
 from .base import AsyncBaseProperty
 from .change_stream import AsyncChangeStream
 from .client_session import AsyncClientSession
 from .command_cursor import AsyncLatentCommandCursor
 from .cursor import AsyncCursor, AsyncRawBatchCursor, Cursor
+from .executor import run_sync
 from .typings import ReadPreferences, Request
 
 if TYPE_CHECKING:
@@ -134,7 +133,7 @@ class AsyncCollection(AsyncBaseProperty, Generic[_DocumentType]):
         bypass_document_validation: bool = False,
         session: Optional[AsyncClientSession] = None,
     ) -> BulkWriteResult:
-        return await util.run_sync(
+        return await run_sync(
             self.dispatch.bulk_write,
             request,
             ordered=ordered,
@@ -149,7 +148,7 @@ class AsyncCollection(AsyncBaseProperty, Generic[_DocumentType]):
         session: Optional[AsyncClientSession] = None,
         **kwargs: Any,
     ) -> int:
-        return await util.run_sync(
+        return await run_sync(
             self.dispatch.count_documents,
             query,
             session=session.dispatch if session else session,
@@ -159,7 +158,7 @@ class AsyncCollection(AsyncBaseProperty, Generic[_DocumentType]):
     async def create_index(
         self, keys: Union[str, List[Tuple[str, Any]]], **kwargs: Any
     ) -> str:
-        return await util.run_sync(self.dispatch.create_index, keys, **kwargs)
+        return await run_sync(self.dispatch.create_index, keys, **kwargs)
 
     async def create_indexes(
         self,
@@ -168,7 +167,7 @@ class AsyncCollection(AsyncBaseProperty, Generic[_DocumentType]):
         session: Optional[AsyncClientSession] = None,
         **kwargs: Any,
     ) -> List[str]:
-        return await util.run_sync(
+        return await run_sync(
             self.dispatch.create_indexes,
             indexes,
             session=session.dispatch if session else session,
@@ -183,7 +182,7 @@ class AsyncCollection(AsyncBaseProperty, Generic[_DocumentType]):
         hint: Optional[Union[IndexModel, List[Tuple[str, Any]]]] = None,
         session: Optional[AsyncClientSession] = None,
     ) -> DeleteResult:
-        return await util.run_sync(
+        return await run_sync(
             self.dispatch.delete_many,
             query,
             collation=collation,
@@ -199,7 +198,7 @@ class AsyncCollection(AsyncBaseProperty, Generic[_DocumentType]):
         hint: Optional[Union[IndexModel, List[Tuple[str, Any]]]] = None,
         session: Optional[AsyncClientSession] = None,
     ) -> DeleteResult:
-        return await util.run_sync(
+        return await run_sync(
             self.dispatch.delete_one,
             query,
             collation=collation,
@@ -215,7 +214,7 @@ class AsyncCollection(AsyncBaseProperty, Generic[_DocumentType]):
         session: Optional[AsyncClientSession] = None,
         **kwargs: Any,
     ) -> List[str]:
-        return await util.run_sync(
+        return await run_sync(
             self.dispatch.distinct,
             key,
             filter=query,
@@ -224,7 +223,7 @@ class AsyncCollection(AsyncBaseProperty, Generic[_DocumentType]):
         )
 
     async def drop(self, session: Optional[AsyncClientSession] = None) -> None:
-        await util.run_sync(
+        await run_sync(
             self.dispatch.drop, session=session.dispatch if session else session
         )
 
@@ -235,7 +234,7 @@ class AsyncCollection(AsyncBaseProperty, Generic[_DocumentType]):
         session: Optional[AsyncClientSession] = None,
         **kwargs: Any,
     ) -> None:
-        await util.run_sync(
+        await run_sync(
             self.dispatch.drop_index,
             index_or_name,
             session=session.dispatch if session else session,
@@ -245,14 +244,14 @@ class AsyncCollection(AsyncBaseProperty, Generic[_DocumentType]):
     async def drop_indexes(
         self, session: Optional[AsyncClientSession] = None, **kwargs
     ) -> None:
-        await util.run_sync(
+        await run_sync(
             self.dispatch.drop_indexes,
             session=session.dispatch if session else session,
             **kwargs,
         )
 
     async def estimated_document_count(self, **kwargs: Any) -> int:
-        return await util.run_sync(self.dispatch.estimated_document_count, **kwargs)
+        return await run_sync(self.dispatch.estimated_document_count, **kwargs)
 
     def find(self, *args: Any, **kwargs: Any) -> AsyncCursor:
         return AsyncCursor(Cursor(self, *args, **kwargs), self)
@@ -260,7 +259,7 @@ class AsyncCollection(AsyncBaseProperty, Generic[_DocumentType]):
     async def find_one(
         self, query: Optional[Mapping[str, Any]], *args: Any, **kwargs: Any
     ) -> Optional[Mapping[str, Any]]:
-        return await util.run_sync(self.dispatch.find_one, query, *args, **kwargs)
+        return await run_sync(self.dispatch.find_one, query, *args, **kwargs)
 
     async def find_one_and_delete(
         self,
@@ -272,7 +271,7 @@ class AsyncCollection(AsyncBaseProperty, Generic[_DocumentType]):
         session: Optional[AsyncClientSession] = None,
         **kwargs: Any,
     ) -> Mapping[str, Any]:
-        return await util.run_sync(
+        return await run_sync(
             self.dispatch.find_one_and_delete,
             query,
             projection=projection,
@@ -295,7 +294,7 @@ class AsyncCollection(AsyncBaseProperty, Generic[_DocumentType]):
         session: Optional[AsyncClientSession] = None,
         **kwargs: Any,
     ) -> Mapping[str, Any]:
-        return await util.run_sync(
+        return await run_sync(
             self.dispatch.find_one_and_replace,
             query,
             replacement,
@@ -322,7 +321,7 @@ class AsyncCollection(AsyncBaseProperty, Generic[_DocumentType]):
         session: Optional[AsyncClientSession] = None,
         **kwargs: Any,
     ) -> Mapping[str, Any]:
-        return await util.run_sync(
+        return await run_sync(
             self.dispatch.find_one_and_update,
             query,
             update,
@@ -348,7 +347,7 @@ class AsyncCollection(AsyncBaseProperty, Generic[_DocumentType]):
     async def index_information(
         self, session: Optional[AsyncClientSession] = None
     ) -> Mapping[str, Any]:
-        return await util.run_sync(
+        return await run_sync(
             self.dispatch.index_information,
             session=session.dispatch if session else session,
         )
@@ -361,7 +360,7 @@ class AsyncCollection(AsyncBaseProperty, Generic[_DocumentType]):
         bypass_document_validation: bool = False,
         session: Optional[AsyncClientSession] = None,
     ) -> InsertManyResult:
-        return await util.run_sync(
+        return await run_sync(
             self.dispatch.insert_many,
             documents,
             ordered=ordered,
@@ -376,7 +375,7 @@ class AsyncCollection(AsyncBaseProperty, Generic[_DocumentType]):
         bypass_document_validation: bool = False,
         session: Optional[AsyncClientSession] = None,
     ) -> InsertOneResult:
-        return await util.run_sync(
+        return await run_sync(
             self.dispatch.insert_one,
             document,
             bypass_document_validation=bypass_document_validation,
@@ -397,7 +396,7 @@ class AsyncCollection(AsyncBaseProperty, Generic[_DocumentType]):
     async def options(
         self, session: Optional[AsyncClientSession] = None
     ) -> Mapping[str, Any]:
-        return await util.run_sync(
+        return await run_sync(
             self.dispatch.options, session=session.dispatch if session else session
         )
 
@@ -408,7 +407,7 @@ class AsyncCollection(AsyncBaseProperty, Generic[_DocumentType]):
         session: Optional[AsyncClientSession] = None,
         **kwargs: Any,
     ) -> Mapping[str, Any]:
-        return await util.run_sync(
+        return await run_sync(
             self.dispatch.rename,
             new_name,
             session=session.dispatch if session else session,
@@ -426,7 +425,7 @@ class AsyncCollection(AsyncBaseProperty, Generic[_DocumentType]):
         hint: Optional[Union[IndexModel, List[Tuple[str, Any]]]] = None,
         session: Optional[AsyncClientSession] = None,
     ) -> UpdateResult:
-        return await util.run_sync(
+        return await run_sync(
             self.dispatch.replace_one,
             query,
             replacement,
@@ -449,7 +448,7 @@ class AsyncCollection(AsyncBaseProperty, Generic[_DocumentType]):
         hint: Optional[Union[IndexModel, List[Tuple[str, Any]]]] = None,
         session: Optional[AsyncClientSession] = None,
     ) -> UpdateResult:
-        return await util.run_sync(
+        return await run_sync(
             self.dispatch.update_many,
             query,
             update,
@@ -473,7 +472,7 @@ class AsyncCollection(AsyncBaseProperty, Generic[_DocumentType]):
         hint: Optional[Union[IndexModel, List[Tuple[str, Any]]]] = None,
         session: Optional[AsyncClientSession] = None,
     ) -> UpdateResult:
-        return await util.run_sync(
+        return await run_sync(
             self.dispatch.update_one,
             query,
             update,
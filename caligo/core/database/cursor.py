@@ -15,9 +15,8 @@ from bson.code import Code
 from pymongo.cursor import Cursor as _Cursor
 from pymongo.typings import _CollationIn, _DocumentType
 
-from caligo import util
-
 from .cursor_base import AsyncCursorBase
+from .executor import run_sync
 
 if TYPE_CHECKING:
     from .collection import AsyncCollection
@@ -58,7 +57,7 @@ class Cursor(_Cursor, Generic[_DocumentType]):
         return self.__data
 
     async def _AsyncCursor__die(self, synchronous: bool = False) -> None:
-        await util.run_sync(self.__die, synchronous=synchronous)
+        await run_sync(self.__die, synchronous=synchronous)
 
     @property
     def _AsyncCursor__exhaust(self) -> bool:
@@ -126,10 +125,10 @@ class AsyncCursor(AsyncCursorBase, Generic[_DocumentType]):
         return self
 
     async def distinct(self, key: str) -> List[Any]:
-        return await util.run_sync(self.dispatch.distinct, key)
+        return await run_sync(self.dispatch.distinct, key)
 
     async def explain(self) -> _DocumentType:
-        return await util.run_sync(self.dispatch.explain)
+        return await run_sync(self.dispatch.explain)
 
     def hint(
         self, index: Union[str, List[Tuple[str, Any]]]
@@ -191,6 +190,10 @@ class AsyncCursor(AsyncCursorBase, Generic[_DocumentType]):
         # skipcq: PYL-W0212
         return self.dispatch._Cursor__killed  # type: ignore
 
+    def _empty(self) -> bool:
+        # skipcq: PYL-W0212
+        return self.dispatch._Cursor__empty  # type: ignore
+
 
 class AsyncRawBatchCursor(AsyncCursor, Generic[_DocumentType]):
     pass
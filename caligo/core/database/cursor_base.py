@@ -19,10 +19,9 @@ from pymongo.collection import Collection
 from pymongo.cursor import _QUERY_OPTIONS, Cursor, RawBatchCursor
 from pymongo.typings import _Address, _DocumentType
 
-from caligo import util
-
 from .base import AsyncBase
 from .errors import InvalidOperation
+from .executor import run_sync
 
 if TYPE_CHECKING:
     from .collection import AsyncCollection
@@ -92,6 +91,9 @@ class AsyncCursorBase(AsyncBase, Generic[_DocumentType]):
     def _data(self) -> Deque[Any]:
         raise NotImplementedError
 
+    def _empty(self) -> bool:  # skipcq: PYL-R0201
+        return False
+
     def _killed(self) -> bool:
         raise NotImplementedError
 
@@ -149,7 +151,7 @@ class AsyncCursorBase(AsyncBase, Generic[_DocumentType]):
                 future.set_exception(exc)
 
     async def _refresh(self) -> int:
-        return await util.run_sync(self.dispatch._refresh)  # skipcq: PYL-W0212
+        return await run_sync(self.dispatch._refresh)  # skipcq: PYL-W0212
 
     def batch_size(self, batch_size: int) -> "AsyncCursorBase":
         self.dispatch.batch_size(batch_size)
@@ -158,11 +160,17 @@ class AsyncCursorBase(AsyncBase, Generic[_DocumentType]):
     async def close(self) -> None:
         if not self.closed:
             self.closed = True
-            await util.run_sync(self.dispatch.close)
+            await run_sync(self.dispatch.close)
 
     async def next(self) -> Any:
+        if self._empty():
+            raise StopAsyncIteration
+
+        # Documents of the current batch are already local, only fetching the
+        # next batch needs a thread. Re-read the buffer after a refresh since
+        # pymongo replaces the deque with every new batch.
         if self.alive and (self._buffer_size() or await self._get_more()):
-            return await util.run_sync(next, self.dispatch)
+            return self._data().popleft()
         raise StopAsyncIteration
 
     def to_list(
@@ -181,10 +189,17 @@ class AsyncCursorBase(AsyncBase, Generic[_DocumentType]):
             future.set_result(the_list)
             return future
 
-        # Ignored the type since some commands are called from command_cursor
-        get_more_future: Union[asyncio.Future, asyncio.Task] = self._get_more()  # type: ignore
-        if inspect.iscoroutine(get_more_future):
-            get_more_future = self.loop.create_task(get_more_future)
+        get_more_future: Union[asyncio.Future, asyncio.Task]
+        buffered = self._buffer_size()
+        if buffered:
+            # Drain what's already fetched before going to a thread for more
+            get_more_future = self.loop.create_future()
+            get_more_future.set_result(buffered)
+        else:
+            # Ignored the type since some commands are called from command_cursor
+            get_more_future = self._get_more()  # type: ignore
+            if inspect.iscoroutine(get_more_future):
+                get_more_future = self.loop.create_task(get_more_future)
 
         get_more_future.add_done_callback(
             partial(
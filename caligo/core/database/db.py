@@ -9,13 +9,12 @@ from pymongo.database import Database
 from pymongo.read_concern import ReadConcern
 from pymongo.write_concern import WriteConcern
 
-from caligo import util
-
 from .base import AsyncBaseProperty
 from .change_stream import AsyncChangeStream
 from .client_session import AsyncClientSession
 from .collection import AsyncCollection
 from .command_cursor import AsyncCommandCursor, AsyncLatentCommandCursor, CommandCursor
+from .executor import run_sync
 from .typings import ReadPreferences
 
 if TYPE_CHECKING:
@@ -75,7 +74,7 @@ class AsyncDatabase(AsyncBaseProperty):
         session: Optional[AsyncClientSession] = None,
         **kwargs: Any,
     ) -> Mapping[str, Any]:
-        return await util.run_sync(
+        return await run_sync(
             self.dispatch.command,
             command,
             value=value,
@@ -105,7 +104,7 @@ class AsyncDatabase(AsyncBaseProperty):
         return AsyncCollection(
             self,
             name,
-            collection=await util.run_sync(
+            collection=await run_sync(
                 self.dispatch.create_collection,
                 name,
                 codec_options=codec_options,
@@ -126,7 +125,7 @@ class AsyncDatabase(AsyncBaseProperty):
         session: Optional[AsyncClientSession] = None,
         **kwargs: Any,
     ) -> Optional[Mapping[str, Any]]:
-        return await util.run_sync(
+        return await run_sync(
             self.dispatch.dereference,
             dbref,
             session=session.dispatch if session else session,
@@ -141,7 +140,7 @@ class AsyncDatabase(AsyncBaseProperty):
         if isinstance(name_or_collection, AsyncCollection):
             name_or_collection = name_or_collection.name
 
-        return await util.run_sync(
+        return await run_sync(
             self.dispatch.drop_collection,
             name_or_collection,
             session=session.dispatch if session else session,
@@ -172,7 +171,7 @@ class AsyncDatabase(AsyncBaseProperty):
         query: Optional[Mapping[str, Any]] = None,
         **kwargs: Any,
     ) -> List[str]:
-        return await util.run_sync(
+        return await run_sync(
             self.dispatch.list_collection_names,
             session=session.dispatch if session else session,
             filter=query,
@@ -189,7 +188,7 @@ class AsyncDatabase(AsyncBaseProperty):
         cmd = SON([("listCollections", 1)])
         cmd.update(query, **kwargs)
 
-        res: Mapping[str, Any] = await util.run_sync(
+        res: Mapping[str, Any] = await run_sync(
             self.dispatch._retryable_read_command,  # skipcq: PYL-W0212
             cmd,
             session=session.dispatch if session else session,
@@ -208,7 +207,7 @@ class AsyncDatabase(AsyncBaseProperty):
         if isinstance(name_or_collection, AsyncCollection):
             name_or_collection = name_or_collection.name
 
-        return await util.run_sync(
+        return await run_sync(
             self.dispatch.validate_collection,
             name_or_collection,
             scandata=scandata,
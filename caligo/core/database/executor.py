@@ -0,0 +1,139 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable, Dict, Optional, TypeVar
+
+Result = TypeVar("Result")
+
+# Same as pymongo's default maxPoolSize
+DEFAULT_POOL_SIZE = 100
+
+
+class DatabaseExecutor:
+    """Dedicated thread pool for blocking pymongo calls.
+
+    Keeping database work off the loop's default executor means slow image,
+    git or network jobs sharing that pool can never starve DB calls. The pool
+    is sized to match the pymongo connection pool, as more threads than
+    connections would only wait on a socket.
+    """
+
+    max_workers: int
+
+    threads: int
+    queued: int
+    active: int
+    completed: int
+    total_wait: float
+    max_wait: float
+
+    _executor: Optional[ThreadPoolExecutor]
+    _lock: threading.Lock
+
+    def __init__(self, max_workers: int = DEFAULT_POOL_SIZE) -> None:
+        self.max_workers = max_workers
+
+        self.threads = 0
+        self.queued = 0
+        self.active = 0
+        self.completed = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+        self._executor = None
+        self._lock = threading.Lock()
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_workers,
+                thread_name_prefix="caligo_db",
+                initializer=self._thread_started,
+            )
+
+        return self._executor
+
+    def resize(self, max_workers: int) -> None:
+        """Changes the pool size, replacing the pool if it was already started."""
+
+        if max_workers == self.max_workers:
+            return
+
+        self.max_workers = max_workers
+        # Already submitted calls keep running on the old pool
+        self.shutdown()
+
+    def _thread_started(self) -> None:
+        # Runs once in every worker thread the pool spawns
+        with self._lock:
+            self.threads += 1
+
+    def _call(self, enqueued: float, func: Callable[[], Result]) -> Result:
+        wait = time.perf_counter() - enqueued
+        with self._lock:
+            self.queued -= 1
+            self.active += 1
+            self.total_wait += wait
+            if wait > self.max_wait:
+                self.max_wait = wait
+
+        try:
+            return func()
+        finally:
+            with self._lock:
+                self.active -= 1
+                self.completed += 1
+
+    def _done(self, future: Future) -> None:
+        # Calls cancelled before a thread picked them up never reach _call
+        if future.cancelled():
+            with self._lock:
+                self.queued -= 1
+
+    async def run(
+        self, func: Callable[..., Result], *args: Any, **kwargs: Any
+    ) -> Result:
+        with self._lock:
+            self.queued += 1
+
+        future = self.executor.submit(
+            self._call, time.perf_counter(), partial(func, *args, **kwargs)
+        )
+        future.add_done_callback(self._done)
+
+        return await asyncio.wrap_future(future)
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+            with self._lock:
+                self.threads = 0
+
+    @property
+    def stats(self) -> Dict[str, Any]:
+        """Snapshot of the pool saturation counters for runtime inspection."""
+
+        with self._lock:
+            started = self.completed + self.active
+            return {
+                "max_workers": self.max_workers,
+                "threads": self.threads,
+                "queued": self.queued,
+                "active": self.active,
+                "completed": self.completed,
+                "avg_wait": self.total_wait / started if started else 0.0,
+                "max_wait": self.max_wait,
+            }
+
+
+executor = DatabaseExecutor()
+
+
+async def run_sync(func: Callable[..., Result], *args: Any, **kwargs: Any) -> Result:
+    """Runs the given blocking pymongo call on the database thread pool."""
+
+    return await executor.run(func, *args, **kwargs)
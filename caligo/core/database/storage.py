@@ -1,7 +1,8 @@
 import asyncio
-import inspect
+import logging
 import time
-from typing import Any, List, Optional, Tuple, Union
+from collections import OrderedDict
+from typing import Any, Dict, List, Mapping, Optional, Tuple, Union
 
 from pymongo import UpdateOne
 from pyrogram.raw.types.input_peer_channel import InputPeerChannel
@@ -12,6 +13,156 @@ from pyrogram.storage.storage import Storage
 
 from . import AsyncDatabase
 
+log = logging.getLogger(__name__)
+
+InputPeer = Union[InputPeerUser, InputPeerChat, InputPeerChannel]
+PEER_FIELDS = {
+    "_id": 1,
+    "access_hash": 1,
+    "type": 1,
+    "username": 1,
+    "phone_number": 1,
+    "last_update_on": 1,
+}
+
+
+class CachedPeer:
+    peer: InputPeer
+    username: Optional[str]
+    phone_number: Optional[str]
+    last_update_on: Optional[int]
+    expires_at: float
+
+    def __init__(
+        self,
+        peer: InputPeer,
+        username: Optional[str],
+        phone_number: Optional[str],
+        last_update_on: Optional[int],
+        expires_at: float,
+    ) -> None:
+        self.peer = peer
+        self.username = username
+        self.phone_number = phone_number
+        self.last_update_on = last_update_on
+        self.expires_at = expires_at
+
+
+class PeerCache:
+    """Bounded LRU cache of resolved peers with per-entry TTL.
+
+    Entries are keyed by peer ID with secondary indexes by username and phone
+    number pointing back at the ID.
+    """
+
+    max_size: int
+    ttl: int
+
+    _peers: "OrderedDict[int, CachedPeer]"
+    _usernames: Dict[str, int]
+    _phone_numbers: Dict[str, int]
+
+    def __init__(self, max_size: int = 4096, ttl: int = 60 * 60) -> None:
+        self.max_size = max_size
+        self.ttl = ttl
+
+        self._peers = OrderedDict()
+        self._usernames = {}
+        self._phone_numbers = {}
+
+    def _unindex(self, peer_id: int, entry: CachedPeer) -> None:
+        if entry.username and self._usernames.get(entry.username) == peer_id:
+            del self._usernames[entry.username]
+        if (
+            entry.phone_number
+            and self._phone_numbers.get(entry.phone_number) == peer_id
+        ):
+            del self._phone_numbers[entry.phone_number]
+
+    def _pop(self, peer_id: int) -> None:
+        entry = self._peers.pop(peer_id, None)
+        if entry is not None:
+            self._unindex(peer_id, entry)
+
+    def get(self, peer_id: Optional[int]) -> Optional[CachedPeer]:
+        if peer_id is None:
+            return None
+
+        entry = self._peers.get(peer_id)
+        if entry is None:
+            return None
+
+        if entry.expires_at < time.monotonic():
+            self._pop(peer_id)
+            return None
+
+        self._peers.move_to_end(peer_id)
+        return entry
+
+    def get_by_username(self, username: str) -> Optional[CachedPeer]:
+        return self.get(self._usernames.get(username))
+
+    def get_by_phone_number(self, phone_number: str) -> Optional[CachedPeer]:
+        return self.get(self._phone_numbers.get(phone_number))
+
+    def put(
+        self,
+        peer_id: int,
+        access_hash: int,
+        peer_type: str,
+        username: Optional[str],
+        phone_number: Optional[str],
+        last_update_on: Optional[int],
+    ) -> None:
+        self._pop(peer_id)
+
+        self._peers[peer_id] = CachedPeer(
+            get_input_peer(peer_id, access_hash, peer_type),
+            username,
+            phone_number,
+            last_update_on,
+            time.monotonic() + self.ttl,
+        )
+        if username:
+            self._usernames[username] = peer_id
+        if phone_number:
+            self._phone_numbers[phone_number] = peer_id
+
+        while len(self._peers) > self.max_size:
+            old_id, old_entry = self._peers.popitem(last=False)
+            self._unindex(old_id, old_entry)
+
+    def put_document(self, doc: Mapping[str, Any]) -> None:
+        # Documents upserted only by update_usernames can't be resolved yet
+        if "access_hash" not in doc or "type" not in doc:
+            return
+
+        self.put(
+            doc["_id"],
+            doc["access_hash"],
+            doc["type"],
+            doc.get("username"),
+            doc.get("phone_number"),
+            doc.get("last_update_on"),
+        )
+
+    def set_username(self, peer_id: int, username: Optional[str]) -> None:
+        entry = self._peers.get(peer_id)
+        if entry is None:
+            return
+
+        if entry.username and self._usernames.get(entry.username) == peer_id:
+            del self._usernames[entry.username]
+
+        entry.username = username
+        if username:
+            self._usernames[username] = peer_id
+
+    def clear(self) -> None:
+        self._peers.clear()
+        self._usernames.clear()
+        self._phone_numbers.clear()
+
 
 class PersistentStorage(Storage):
     """
@@ -25,6 +176,10 @@ class PersistentStorage(Storage):
     lock: asyncio.Lock
     USERNAME_TTL = 8 * 60 * 60
 
+    _session_data: Dict[str, Any]
+    _dirty: Dict[str, Any]
+    _flush_task: Optional[asyncio.Task]
+
     def __init__(self, database: AsyncDatabase, remove_peers: bool = False) -> None:
         # Propagate initialization
         super().__init__("")
@@ -33,8 +188,12 @@ class PersistentStorage(Storage):
         self.lock = asyncio.Lock()
 
         self._peer = database["PEERS"]
+        self._peer_cache = PeerCache()
         self._remove_peers = remove_peers
         self._session = database["SESSION"]
+        self._session_data = {}
+        self._dirty = {}
+        self._flush_task = None
         self._states = database["update_state"]
 
     async def open(self) -> None:
@@ -48,33 +207,37 @@ class PersistentStorage(Storage):
         is_bot    INTEGER
         """
 
-        if await self._session.find_one({"_id": 0}, {}):
+        data = await self._session.find_one({"_id": 0})
+        if data:
+            self._session_data = data
             return
 
-        await self._session.insert_one(
-            {
-                "_id": 0,
-                "dc_id": 2,
-                "api_id": None,
-                "test_mode": None,
-                "auth_key": b"",
-                "date": 0,
-                "user_id": 0,
-                "is_bot": 0,
-            }
-        )
+        self._session_data = {
+            "_id": 0,
+            "dc_id": 2,
+            "api_id": None,
+            "test_mode": None,
+            "auth_key": b"",
+            "date": 0,
+            "user_id": 0,
+            "is_bot": 0,
+        }
+        await self._session.insert_one(dict(self._session_data))
 
     async def save(self) -> None:
-        pass
+        await self._flush()
 
     async def close(self) -> None:
-        pass
+        await self._flush()
 
     async def delete(self) -> None:
+        self._session_data = {}
+        self._dirty = {}
         try:
             await self._session.delete_one({"_id": 0})
             if self._remove_peers:
                 await self._peer.delete_many({})
+                self._peer_cache.clear()
         except Exception:  # skipcq: PYL-W0703
             return
 
@@ -102,6 +265,11 @@ class PersistentStorage(Storage):
 
         await self._peer.bulk_write(bulk)
 
+        for peer_id, access_hash, peer_type, username, phone_number in peers:
+            self._peer_cache.put(
+                peer_id, access_hash, peer_type, username, phone_number, s
+            )
+
     async def update_usernames(self, usernames: List[Tuple[int, str]]) -> None:
         bulk = [
             UpdateOne(
@@ -116,6 +284,9 @@ class PersistentStorage(Storage):
 
         await self._peer.bulk_write(bulk)
 
+        for user_id, username in usernames:
+            self._peer_cache.set_username(user_id, username)
+
     async def update_state(self, value: Tuple[int, int, int, int, int] = object):
         if value == object:
             states = [
@@ -140,80 +311,110 @@ class PersistentStorage(Storage):
                     upsert=True,
                 )
 
-    async def get_peer_by_id(
-        self, peer_id: int
-    ) -> Union[InputPeerUser, InputPeerChat, InputPeerChannel]:
-        # id, access_hash, type
-        res = await self._peer.find_one(
-            {"_id": peer_id}, {"_id": 1, "access_hash": 1, "type": 1}
-        )
+    async def get_peer_by_id(self, peer_id: int) -> InputPeer:
+        cached = self._peer_cache.get(peer_id)
+        if cached is not None:
+            return cached.peer
+
+        res = await self._peer.find_one({"_id": peer_id}, PEER_FIELDS)
         if not res:
             raise KeyError(f"ID not found: {peer_id}")
 
-        return get_input_peer(*res.values())
+        self._peer_cache.put_document(res)
+        return get_input_peer(res["_id"], res["access_hash"], res["type"])
 
-    async def get_peer_by_username(
-        self, username: str
-    ) -> Union[InputPeerUser, InputPeerChat, InputPeerChannel]:
-        # id, access_hash, type, last_update_on,
-        res = await self._peer.find_one(
-            {"username": username},
-            {"_id": 1, "access_hash": 1, "type": 1, "last_update_on": 1},
-        )
+    async def get_peer_by_username(self, username: str) -> InputPeer:
+        cached = self._peer_cache.get_by_username(username)
+        if cached is not None and cached.last_update_on is not None:
+            last_update_on = cached.last_update_on
+            peer = cached.peer
+        else:
+            res = await self._peer.find_one({"username": username}, PEER_FIELDS)
+            if not res:
+                raise KeyError(f"Username not found: {username}")
 
-        if not res:
-            raise KeyError(f"Username not found: {username}")
+            self._peer_cache.put_document(res)
+            last_update_on = res["last_update_on"]
+            peer = get_input_peer(res["_id"], res["access_hash"], res["type"])
 
-        if abs(time.time() - res["last_update_on"]) > self.USERNAME_TTL:
+        if abs(time.time() - last_update_on) > self.USERNAME_TTL:
             raise KeyError(f"Username expired: {username}")
 
-        return get_input_peer(res["_id"], res["access_hash"], res["type"])
+        return peer
 
-    async def get_peer_by_phone_number(
-        self, phone_number: str
-    ) -> Union[InputPeerUser, InputPeerChat, InputPeerChannel]:
-        #  _id, access_hash, type,
-        res = await self._peer.find_one(
-            {"phone_number": phone_number}, {"_id": 1, "access_hash": 1, "type": 1}
-        )
+    async def get_peer_by_phone_number(self, phone_number: str) -> InputPeer:
+        cached = self._peer_cache.get_by_phone_number(phone_number)
+        if cached is not None:
+            return cached.peer
 
+        res = await self._peer.find_one({"phone_number": phone_number}, PEER_FIELDS)
         if not res:
             raise KeyError(f"Phone number not found: {phone_number}")
 
-        return get_input_peer(*res.values())
+        self._peer_cache.put_document(res)
+        return get_input_peer(res["_id"], res["access_hash"], res["type"])
+
+    async def _flush(self) -> None:
+        async with self.lock:
+            if not self._dirty:
+                return
 
-    async def _get(self) -> Optional[Any]:
-        attr = inspect.stack()[2].function
-        data = await self._session.find_one({"_id": 0}, {attr: 1})
-        if not data:
+            fields, self._dirty = self._dirty, {}
+            try:
+                await self._session.update_one(
+                    {"_id": 0}, {"$set": fields}, upsert=True
+                )
+            except Exception:
+                # Don't lose fields that weren't overwritten in the meantime
+                self._dirty = {**fields, **self._dirty}
+                raise
+
+    def _schedule_flush(self) -> None:
+        self._flush_task = asyncio.get_running_loop().create_task(self._flush())
+        self._flush_task.add_done_callback(self._flush_done)
+
+    def _flush_done(self, task: asyncio.Task) -> None:
+        self._flush_task = None
+        if task.cancelled():
             return
 
-        return data[attr]
+        if task.exception() is not None:
+            log.error("Failed to write session", exc_info=task.exception())
+        elif self._dirty:
+            # Fields were set while the previous write was in flight
+            self._schedule_flush()
 
-    async def _set(self, value: Any) -> None:
-        attr = inspect.stack()[2].function
-        await self._session.update_one({"_id": 0}, {"$set": {attr: value}}, upsert=True)
+    def _set(self, attr: str, value: Any) -> None:
+        self._session_data[attr] = value
+        self._dirty[attr] = value
+
+        # Fields set back to back are written together once the caller yields
+        if self._flush_task is None:
+            self._schedule_flush()
+
+    async def _accessor(self, attr: str, value: Any = object) -> Any:
+        if value == object:
+            return self._session_data.get(attr)
 
-    async def _accessor(self, value: Any = object) -> Any:
-        return await self._get() if value == object else await self._set(value)
+        return self._set(attr, value)
 
     async def dc_id(self, value=object) -> Optional[int]:
-        return await self._accessor(value)
+        return await self._accessor("dc_id", value)
 
     async def api_id(self, value=object) -> Optional[int]:
-        return await self._accessor(value)
+        return await self._accessor("api_id", value)
 
     async def test_mode(self, value=object) -> Optional[bool]:
-        return await self._accessor(value)
+        return await self._accessor("test_mode", value)
 
     async def auth_key(self, value=object) -> Optional[bytes]:
-        return await self._accessor(value)
+        return await self._accessor("auth_key", value)
 
     async def date(self, value=object) -> Optional[int]:
-        return await self._accessor(value)
+        return await self._accessor("date", value)
 
     async def user_id(self, value=object) -> Optional[int]:
-        return await self._accessor(value)
+        return await self._accessor("user_id", value)
 
     async def is_bot(self, value=object) -> Optional[bool]:
-        return await self._accessor(value)
+        return await self._accessor("is_bot", value)
@@ -4,6 +4,7 @@ import dns.resolver
 
 from .base import CaligoBase
 from .database import AsyncClient, AsyncDatabase
+from .database.executor import DEFAULT_POOL_SIZE, executor
 
 if TYPE_CHECKING:
     from .bot import Caligo
@@ -19,8 +20,17 @@ class DatabaseProvider(CaligoBase):
             dns.resolver.default_resolver = dns.resolver.Resolver(configure=False)
             dns.resolver.default_resolver.nameservers = db_dns
 
-        client = AsyncClient(self.config["bot"]["db_uri"], connect=False)
+        # Database calls run on their own thread pool sized to the connection pool
+        pool_size = self.config["bot"].get("db_pool_size", DEFAULT_POOL_SIZE)
+        client = AsyncClient(
+            self.config["bot"]["db_uri"], connect=False, maxPoolSize=pool_size
+        )
         self.db = client.get_database("CALIGO")
 
         # Propagate initialization to other mixins
         super().__init__(**kwargs)
+
+    async def close_db(self: "Caligo") -> None:
+        await self.db.close()
+        # No database calls are left to run once the client is closed
+        executor.shutdown()
@@ -1,6 +1,16 @@
 import asyncio
 import bisect
-from typing import TYPE_CHECKING, Any, MutableMapping, MutableSequence, Optional
+import inspect
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    MutableMapping,
+    MutableSequence,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
 
 from pyrogram.filters import Filter
 from pyrogram.types import CallbackQuery, InlineQuery, Message
@@ -9,19 +19,61 @@ from caligo import module, util
 from caligo.listener import Listener, ListenerFunc
 
 from .base import CaligoBase
+from .scheduler import ListenerScheduler, in_worker
 
 if TYPE_CHECKING:
     from .bot import Caligo
 
+Update = Union[CallbackQuery, InlineQuery, Message]
+
+BUILTIN_EVENTS = {"load", "start", "started", "stop", "stopped"}
+
+
+class EventRoute:
+    """Precompiled dispatch plan of a single event.
+
+    Listeners are kept in priority order, while the filtered ones are split out
+    together with whether their filter has to be awaited or run on a thread.
+    """
+
+    listeners: Sequence[Listener]
+    filtered: Sequence[Tuple[Listener, bool]]
+
+    def __init__(self, listeners: Sequence[Listener]) -> None:
+        self.listeners = tuple(listeners)
+        self.filtered = tuple(
+            (lst, inspect.iscoroutinefunction(lst.filters.__call__))
+            for lst in self.listeners
+            if lst.filters is not None
+        )
+
 
 class EventDispatcher(CaligoBase):
     listeners: MutableMapping[str, MutableSequence[Listener]]
+    routes: MutableMapping[str, EventRoute]
+    scheduler: ListenerScheduler
 
     def __init__(self: "Caligo", **kwargs: Any) -> None:
         self.listeners = {}
+        self.routes = {}
+
+        config = self.config["bot"]
+        self.scheduler = ListenerScheduler(
+            workers=config.get("listener_workers", 16),
+            module_limit=config.get("listener_module_limit", 8),
+            event_limit=config.get("listener_event_limit", 0),
+            queue_size=config.get("listener_queue_size", 1024),
+            perf=self.perf,
+        )
 
         super().__init__(**kwargs)
 
+    def _compile_route(self: "Caligo", event: str) -> None:
+        try:
+            self.routes[event] = EventRoute(self.listeners[event])
+        except KeyError:
+            self.routes.pop(event, None)
+
     def register_listener(
         self: "Caligo",
         mod: module.Module,
@@ -31,10 +83,7 @@ class EventDispatcher(CaligoBase):
         priority: int = 100,
         filters: Optional[Filter] = None,
     ) -> None:
-        if (
-            event in {"load", "start", "started", "stop", "stopped"}
-            and filters is not None
-        ):
+        if event in BUILTIN_EVENTS and filters is not None:
             self.log.warning("Built-in Listener can't be use with filters. Removing...")
             filters = None
 
@@ -55,14 +104,14 @@ class EventDispatcher(CaligoBase):
         else:
             self.listeners[event] = [listener]
 
-        self.update_module_events()
+        self._compile_route(event)
 
     def unregister_listener(self: "Caligo", listener: Listener) -> None:
         self.listeners[listener.event].remove(listener)
         if not self.listeners[listener.event]:
             del self.listeners[listener.event]
 
-        self.update_module_events()
+        self._compile_route(listener.event)
 
     def register_listeners(self: "Caligo", mod: module.Module) -> None:
         for event, func in util.misc.find_prefixed_funcs(mod, "on_"):
@@ -91,43 +140,84 @@ class EventDispatcher(CaligoBase):
         for listener in to_unreg:
             self.unregister_listener(listener)
 
+    async def _match_filter(
+        self: "Caligo", lst: Listener, is_async: bool, update: Update
+    ) -> bool:
+        if is_async:
+            return await lst.filters(self.client, update)  # type: ignore
+
+        return await util.run_sync(lst.filters, self.client, update)  # type: ignore
+
+    async def _run_listener(
+        self: "Caligo", lst: Listener, *args: Any, **kwargs: Any
+    ) -> None:
+        with self.perf.measure(
+            "listener", lst.module.name, f"{lst.event}:{lst.func.__name__}"
+        ):
+            await lst.func(*args, **kwargs)
+
     async def dispatch_event(
         self: "Caligo", event: str, *args: Any, wait: bool = True, **kwargs: Any
     ) -> None:
-        tasks = set()
-
         try:
-            listeners = self.listeners[event]
+            route = self.routes[event]
         except KeyError:
             return None
 
-        if not listeners:
-            return
+        listeners = route.listeners
+        if route.filtered:
+            update = next(
+                (
+                    arg
+                    for arg in args
+                    if isinstance(arg, (CallbackQuery, InlineQuery, Message))
+                ),
+                None,
+            )
+            if update is None:
+                self.log.error("'%s' can't be used with pattern", event)
+                matches = set()
+            else:
+                # Filters are independent of each other, evaluate them all at once
+                results = await asyncio.gather(
+                    *(
+                        self._match_filter(lst, is_async, update)
+                        for lst, is_async in route.filtered
+                    )
+                )
+                matches = {
+                    lst for (lst, _), match in zip(route.filtered, results) if match
+                }
 
-        args = tuple(args)
-        for lst in listeners:
-            if lst.filters is not None:
-                for arg in args:
-                    if isinstance(arg, (CallbackQuery, InlineQuery, Message)):
-                        match = await lst.filters(self.client, arg)
-                        if not match:
-                            continue
+            listeners = [
+                lst for lst in listeners if lst.filters is None or lst in matches
+            ]
 
-                        break
+        if not listeners:
+            return
 
-                    self.log.error("'%s' can't be used with pattern", event)
-                else:
-                    continue
+        self.log.debug("Dispatching event '%s' with data %s", event, args)
 
-            task = self.loop.create_task(lst.func(*args, **kwargs))
-            tasks.add(task)
+        # Lifecycle events and nested waits from inside a worker bypass the pool,
+        # the latter would otherwise deadlock once every worker is waiting
+        if event in BUILTIN_EVENTS or (wait and in_worker.get()):
+            tasks = {
+                self.loop.create_task(self._run_listener(lst, *args, **kwargs))
+                for lst in listeners
+            }
+            if wait:
+                await asyncio.wait(tasks)
 
-        if not tasks:
             return
 
-        self.log.debug("Dispatching event '%s' with data %s", event, args)
-        if wait:
-            await asyncio.wait(tasks)
+        futures = []
+        for lst in listeners:
+            future = await self.scheduler.submit(lst, args, kwargs, wait)
+            if future is not None:
+                futures.append(future)
+
+        if futures:
+            await asyncio.wait(futures)
 
     async def log_stat(self: "Caligo", stat: str) -> None:
         await self.dispatch_event("stat_event", stat, wait=False)
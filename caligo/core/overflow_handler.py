@@ -0,0 +1,201 @@
+import re
+from typing import TYPE_CHECKING, Any, Optional, Sequence
+
+from pyrogram import raw
+from pyrogram.enums import ParseMode
+from pyrogram.errors import BotInlineDisabled, MessageNotModified
+from pyrogram.types import (
+    CallbackQuery,
+    InlineKeyboardButton,
+    InlineKeyboardMarkup,
+    InlineQuery,
+    InlineQueryResultArticle,
+    InputTextMessageContent,
+    Message,
+)
+
+from caligo.util import overflow, run_sync, tg
+
+from .base import CaligoBase
+
+if TYPE_CHECKING:
+    from .bot import Caligo
+
+# Overflowing text of at least this many characters is sent gzip-compressed
+COMPRESS_THRESHOLD = 1 << 20
+
+PAGE_QUERY_PREFIX = "page:"
+PAGE_CALLBACK = re.compile(r"page\((\w+)(?:,(\d+))?\)$")
+
+
+def page_buttons(key: str, index: int, count: int) -> InlineKeyboardMarkup:
+    row = []
+    if index > 0:
+        row.append(
+            InlineKeyboardButton("⇠ Prev", callback_data=f"page({key},{index - 1})")
+        )
+    row.append(
+        InlineKeyboardButton(f"{index + 1}/{count}", callback_data=f"page({key})")
+    )
+    if index < count - 1:
+        row.append(
+            InlineKeyboardButton("Next ⇢", callback_data=f"page({key},{index + 1})")
+        )
+
+    return InlineKeyboardMarkup([row])
+
+
+class OverflowHandler(CaligoBase):
+    """Delivers responses too long for a single message.
+
+    In split mode, output fitting within overflow_page_limit pages is sent as
+    one message through the helper bot, with buttons flipping between pages
+    served from an in-memory cache. Anything else becomes a document, which is
+    gzip-compressed once the text reaches overflow_compress_threshold.
+    """
+
+    overflow_pages: overflow.PageCache
+
+    def __init__(self: "Caligo", **kwargs: Any) -> None:
+        self.overflow_pages = overflow.PageCache()
+
+        super().__init__(**kwargs)
+
+    async def respond_overflow(
+        self: "Caligo",
+        msg: Message,
+        text: str,
+        *,
+        input_arg: str = "",
+        mode: Optional[str] = None,
+        overflow_mode: Optional[str] = None,
+        redact: bool = True,
+        **kwargs: Any,
+    ) -> Message:
+        config = self.config["bot"]
+        if overflow_mode is None:
+            overflow_mode = config.get("overflow_mode", "truncate")
+
+        page_limit = config.get("overflow_page_limit", 4)
+        # Markup only shrinks when parsed, so longer text can't fit the page limit
+        if (
+            overflow_mode == "split"
+            and self.helper_initialized
+            and len(text) <= page_limit * tg.MESSAGE_CHAR_LIMIT * 2
+        ):
+            if redact:
+                text = self.redact_message(text)
+                redact = False
+
+            pages = await overflow.paginate(
+                self.client, text, kwargs.get("parse_mode"), tg.MESSAGE_CHAR_LIMIT
+            )
+            if len(pages) <= page_limit:
+                try:
+                    return await self.send_pages(msg, pages, mode=mode)
+                except BotInlineDisabled:
+                    self.log.warning("Inline mode of the helper bot is disabled")
+
+        threshold = config.get("overflow_compress_threshold", COMPRESS_THRESHOLD)
+        document = await run_sync(
+            overflow.build_document,
+            text,
+            compress=len(text) >= threshold,
+            redactor=self.redactor if redact else None,
+        )
+        response = await tg.send_as_document(document, msg, input_arg)
+
+        if mode != "reply":
+            await msg.delete()
+
+        return response
+
+    async def send_pages(
+        self: "Caligo", msg: Message, pages: Sequence[str], *, mode: Optional[str]
+    ) -> Message:
+        key = self.overflow_pages.put(pages)
+        results = await self.client.get_inline_bot_results(
+            self.client_helper.me.username, PAGE_QUERY_PREFIX + key
+        )
+        updates = await self.client.send_inline_bot_result(
+            msg.chat.id,
+            results.query_id,
+            results.results[0].id,
+            message_thread_id=msg.message_thread_id if msg.is_topic_message else None,
+        )
+
+        if mode != "reply":
+            await msg.delete()
+
+        # Build the sent message from the updates instead of fetching it again
+        users = {user.id: user for user in updates.users}
+        chats = {chat.id: chat for chat in updates.chats}
+        for update in updates.updates:
+            if isinstance(
+                update, (raw.types.UpdateNewMessage, raw.types.UpdateNewChannelMessage)
+            ):
+                return await Message._parse(  # skipcq: PYL-W0212
+                    self.client, update.message, users, chats
+                )
+
+        return await self.client.get_messages(msg.chat.id, updates.updates[0].id)
+
+    async def answer_page_query(self: "Caligo", query: InlineQuery) -> bool:
+        if not query.query.startswith(PAGE_QUERY_PREFIX):
+            return False
+
+        if not query.from_user or query.from_user.id != self.uid:
+            await query.answer([], cache_time=0, is_personal=True)
+            return True
+
+        key = query.query[len(PAGE_QUERY_PREFIX) :]
+        pages = self.overflow_pages.get(key)
+        results = []
+        if pages is not None:
+            results.append(
+                InlineQueryResultArticle(
+                    title="Output",
+                    input_message_content=InputTextMessageContent(
+                        pages[0],
+                        parse_mode=ParseMode.HTML,
+                        disable_web_page_preview=True,
+                    ),
+                    id=key,
+                    description=f"{len(pages)} pages",
+                    reply_markup=page_buttons(key, 0, len(pages)),
+                )
+            )
+
+        await query.answer(results, cache_time=0, is_personal=True)
+        return True
+
+    async def answer_page_callback(self: "Caligo", query: CallbackQuery) -> bool:
+        match = PAGE_CALLBACK.match(query.data) if isinstance(query.data, str) else None
+        if match is None:
+            return False
+
+        if query.from_user.id != self.uid:
+            await query.answer(
+                "Sorry, you don't have permission to access.", show_alert=True
+            )
+            return True
+
+        key, index = match.groups()
+        pages = self.overflow_pages.get(key)
+        if pages is None:
+            await query.answer("These pages have expired.", show_alert=True)
+            return True
+
+        if index is not None and int(index) < len(pages):
+            try:
+                await query.edit_message_text(
+                    pages[int(index)],
+                    parse_mode=ParseMode.HTML,
+                    disable_web_page_preview=True,
+                    reply_markup=page_buttons(key, int(index), len(pages)),
+                )
+            except MessageNotModified:
+                pass
+
+        await query.answer()
+        return True
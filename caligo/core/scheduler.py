@@ -0,0 +1,254 @@
+import asyncio
+import contextvars
+import logging
+from collections import Counter, deque
+from typing import Any, Deque, Dict, List, Mapping, Optional, Set, Tuple
+
+from caligo.listener import Listener
+from caligo.util.perf import PerfRegistry
+
+# Set inside worker tasks so nested waiting dispatches don't queue behind themselves
+in_worker: contextvars.ContextVar[bool] = contextvars.ContextVar(
+    "in_worker", default=False
+)
+
+
+Job = Tuple[Listener, Tuple[Any, ...], Mapping[str, Any], Optional[asyncio.Future]]
+
+# Queued to get an idle worker to look at parked jobs again
+_WAKE = object()
+
+
+class ListenerScheduler:
+    """Runs listener invocations on a bounded pool of worker tasks.
+
+    Besides the global worker count, concurrency is capped per module and per
+    event so one busy module can't take over the whole pool. Jobs over their
+    caps are parked without holding a worker until a job of the same module or
+    event finishes. Queued and parked jobs share a bounded number of slots,
+    which makes producers apply backpressure instead of spawning tasks without
+    limit. Listeners submitting from inside a worker never wait for a slot, as
+    that could deadlock the pool, and run on an overflow task when none is free.
+    """
+
+    log: logging.Logger
+    perf: Optional[PerfRegistry]
+    workers: int
+    module_limit: int
+    event_limit: int
+
+    active: int
+    completed: int
+    errors: int
+    overflowed: int
+    pending_module: Counter
+    pending_event: Counter
+    active_module: Counter
+    active_event: Counter
+
+    _queue: Optional[asyncio.Queue]
+    _slots: Optional[asyncio.Semaphore]
+    _parked: Deque[Job]
+    _tasks: List[asyncio.Task]
+    _overflow: Set[asyncio.Task]
+
+    def __init__(
+        self,
+        *,
+        workers: int = 16,
+        module_limit: int = 8,
+        event_limit: int = 0,
+        queue_size: int = 1024,
+        perf: Optional[PerfRegistry] = None,
+    ) -> None:
+        self.log = logging.getLogger("Scheduler")
+        self.perf = perf
+        self.workers = max(1, workers)
+        self.module_limit = module_limit or self.workers
+        self.event_limit = event_limit or self.workers
+        self.queue_size = queue_size
+
+        self.active = 0
+        self.completed = 0
+        self.errors = 0
+        self.overflowed = 0
+        self.pending_module = Counter()
+        self.pending_event = Counter()
+        self.active_module = Counter()
+        self.active_event = Counter()
+
+        self._queue = None
+        self._slots = None
+        self._parked = deque()
+        self._tasks = []
+        self._overflow = set()
+
+    def _ensure_started(self) -> Tuple[asyncio.Queue, asyncio.Semaphore]:
+        if self._queue is None or self._slots is None:
+            self._queue = asyncio.Queue()
+            self._slots = asyncio.Semaphore(self.queue_size)
+            loop = asyncio.get_running_loop()
+            self._tasks = [
+                loop.create_task(self._worker(), name=f"listener_worker_{i}")
+                for i in range(self.workers)
+            ]
+
+        return self._queue, self._slots
+
+    def _admissible(self, lst: Listener) -> bool:
+        return (
+            self.active_module[lst.module.name] < self.module_limit
+            and self.active_event[lst.event] < self.event_limit
+        )
+
+    def _take_parked(self) -> Optional[Job]:
+        for i, job in enumerate(self._parked):
+            if self._admissible(job[0]):
+                del self._parked[i]
+                return job
+
+        return None
+
+    async def _worker(self) -> None:
+        in_worker.set(True)
+        queue: asyncio.Queue = self._queue  # type: ignore
+
+        while True:
+            job = self._take_parked()
+            if job is None:
+                item = await queue.get()
+                if item is _WAKE:
+                    continue
+
+                if not self._admissible(item[0]):
+                    self._parked.append(item)
+                    continue
+
+                job = item
+
+            # The job leaves the backlog once it starts running
+            self._slots.release()  # type: ignore
+            await self._execute(job)
+
+    async def _execute(self, job: Job) -> None:
+        lst, args, kwargs, future = job
+        try:
+            await self._run(lst, args, kwargs)
+        except asyncio.CancelledError:
+            if future is not None and not future.done():
+                future.cancel()
+
+            raise
+        except Exception as e:  # skipcq: PYL-W0703
+            self.errors += 1
+            self.log.error("Error in listener %r", lst, exc_info=e)
+
+        if future is not None and not future.done():
+            future.set_result(None)
+
+    async def _run(
+        self, lst: Listener, args: Tuple[Any, ...], kwargs: Mapping[str, Any]
+    ) -> None:
+        mod_name = lst.module.name
+        self.pending_module[mod_name] -= 1
+        self.pending_event[lst.event] -= 1
+        self.active += 1
+        self.active_module[mod_name] += 1
+        self.active_event[lst.event] += 1
+        try:
+            if self.perf is not None:
+                with self.perf.measure(
+                    "listener", mod_name, f"{lst.event}:{lst.func.__name__}"
+                ):
+                    await lst.func(*args, **kwargs)
+            else:
+                await lst.func(*args, **kwargs)
+        finally:
+            self.active -= 1
+            self.active_module[mod_name] -= 1
+            self.active_event[lst.event] -= 1
+            self.completed += 1
+
+    def _overflow_done(self, task: asyncio.Task) -> None:
+        self._overflow.discard(task)
+        # Finishing may have freed a cap some parked job is waiting for
+        if self._parked and self._queue is not None:
+            self._queue.put_nowait(_WAKE)
+
+    async def submit(
+        self,
+        lst: Listener,
+        args: Tuple[Any, ...],
+        kwargs: Mapping[str, Any],
+        wait: bool,
+    ) -> Optional[asyncio.Future]:
+        """Queues a listener invocation, returning a future if it will be waited on."""
+
+        future = asyncio.get_running_loop().create_future() if wait else None
+        queue, slots = self._ensure_started()
+
+        self.pending_module[lst.module.name] += 1
+        self.pending_event[lst.event] += 1
+
+        if in_worker.get() and slots.locked():
+            self.overflowed += 1
+            task = asyncio.get_running_loop().create_task(
+                self._execute((lst, args, kwargs, future))
+            )
+            self._overflow.add(task)
+            task.add_done_callback(self._overflow_done)
+            return future
+
+        await slots.acquire()
+        queue.put_nowait((lst, args, kwargs, future))
+
+        return future
+
+    async def close(self) -> None:
+        tasks = [*self._tasks, *self._overflow]
+        for task in tasks:
+            task.cancel()
+
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+        # Release anyone still waiting on jobs that will never run
+        jobs = list(self._parked)
+        while self._queue is not None and not self._queue.empty():
+            item = self._queue.get_nowait()
+            if item is not _WAKE:
+                jobs.append(item)
+
+        for *_, future in jobs:
+            if future is not None and not future.done():
+                future.cancel()
+
+        self._tasks = []
+        self._overflow = set()
+        self._parked.clear()
+        self._queue = None
+        self._slots = None
+
+    @property
+    def queued(self) -> int:
+        queued = self._queue.qsize() if self._queue is not None else 0
+        return queued + len(self._parked)
+
+    @property
+    def stats(self) -> Dict[str, Any]:
+        """Snapshot of the scheduler counters for runtime inspection."""
+
+        return {
+            "workers": len(self._tasks),
+            "queued": self.queued,
+            "parked": len(self._parked),
+            "overflow": len(self._overflow),
+            "active": self.active,
+            "completed": self.completed,
+            "errors": self.errors,
+            "overflowed": self.overflowed,
+            "pending_module": +self.pending_module,
+            "pending_event": +self.pending_event,
+            "active_module": +self.active_module,
+            "active_event": +self.active_event,
+        }
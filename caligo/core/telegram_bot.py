@@ -2,10 +2,19 @@ import asyncio
 import signal
 from functools import partial
 from hashlib import sha256
-from typing import TYPE_CHECKING, Any, List, Optional, Type, Union
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Awaitable,
+    Callable,
+    List,
+    Mapping,
+    Optional,
+    Type,
+    Union,
+)
 
 from aiopath import AsyncPath
-from pyrogram import filters as filt
 from pyrogram.client import Client
 from pyrogram.enums import ParseMode
 from pyrogram.errors import (
@@ -15,12 +24,12 @@ from pyrogram.errors import (
     SessionRevoked,
 )
 from pyrogram.handlers.callback_query_handler import CallbackQueryHandler
-from pyrogram.handlers.deleted_messages_handler import DeletedMessagesHandler
 from pyrogram.handlers.inline_query_handler import InlineQueryHandler
 from pyrogram.handlers.message_handler import MessageHandler
 from pyrogram.types import CallbackQuery, InlineQuery, Message, User
 
 from caligo.util import tg, time
+from caligo.util.redact import Redactor
 
 from .base import CaligoBase
 from .database.storage import PersistentStorage
@@ -28,16 +37,19 @@ from .database.storage import PersistentStorage
 if TYPE_CHECKING:
     from .bot import Caligo
 
-Handler = Union[
-    CallbackQueryHandler, DeletedMessagesHandler, InlineQueryHandler, MessageHandler
-]
 Update = Union[CallbackQuery, InlineQuery, List[Message], Message]
 
+# Events routed from the message handler, and from handlers of the helper bot
+MESSAGE_EVENTS = ("message", "chat_action")
+HELPER_EVENTS: Mapping[str, Type[Union[CallbackQueryHandler, InlineQueryHandler]]] = {
+    "callback_query": CallbackQueryHandler,
+    "inline_query": InlineQueryHandler,
+}
+
 
 class TelegramBot(CaligoBase):
     bot_client: Client
     client: Client
-    prefix: str
     user: User
     uid: int
     start_time_us: int
@@ -45,12 +57,21 @@ class TelegramBot(CaligoBase):
     bot_user: User
     bot_uid: int
 
+    redactor: Redactor
+
     __idle__: asyncio.Task[None]
 
     def __init__(self: "Caligo", **kwargs: Any) -> None:
         self.loaded = False
 
-        self._mevent_handlers = {}
+        # Modules can register their own secrets with self.bot.redactor.add
+        self.redactor = Redactor()
+        self.redactor.add(
+            str(self.config["telegram"]["api_id"]),
+            self.config["telegram"]["api_hash"],
+            self.config["bot"]["db_uri"],
+            self.config["telegram"]["helper"].get("token"),
+        )
 
         self.__idle__ = None  # type: ignore
 
@@ -101,20 +122,14 @@ class TelegramBot(CaligoBase):
         self.log.info("Starting")
         await self.init_client()
 
-        # Command handler
-        self.client.add_handler(
-            MessageHandler(
-                self.on_command,
-                filters=(self.command_predicate() & filt.me & filt.outgoing),
-            ),
-            0,
-        )
-
-        # Conversation handler
-        self.client.add_handler(
-            MessageHandler(self.on_conversation, filters=self.conversation_predicate()),
-            0,
-        )
+        # Single root handler per update type, routing to commands, conversations
+        # and listeners internally so the cost per update doesn't grow with them
+        self.client.add_handler(MessageHandler(self.on_message_update), 0)
+        if self.helper_initialized:
+            for name, handler in HELPER_EVENTS.items():
+                self.client_helper.add_handler(
+                    handler(self.route_helper_event(name)), 0
+                )
 
         # Load modules
         self.load_all_modules()
@@ -200,100 +215,50 @@ class TelegramBot(CaligoBase):
         finally:
             await self.stop()
 
-    def update_helper_event(
-        self: "Caligo",
-        name: str,
-        event_type: Type[Handler],
-        filters: Optional[filt.Filter] = None,
-        group: int = 0,
-    ) -> None:
-        if name in self.listeners:
-            if name not in self._mevent_handlers:
-
-                async def update_event(_: Client, event: Update) -> None:
-                    await self.dispatch_event(name, event)
-
-                if filters is not None:
-                    event_info = (event_type(update_event, filters), group)
-                else:
-                    event_info = (event_type(update_event), group)
-
-                self.client_helper.add_handler(*event_info)
-                self._mevent_handlers[name] = event_info
-        elif name in self._mevent_handlers:
-            self.client_helper.remove_handler(*self._mevent_handlers[name])
-            del self._mevent_handlers[name]
-
-    def update_module_event(
-        self: "Caligo",
-        name: str,
-        event_type: Type[Handler],
-        filters: Optional[filt.Filter] = None,
-        group: int = 0,
-    ) -> None:
-        if name in self.listeners:
-            if name not in self._mevent_handlers:
-
-                async def update_event(_: Client, event: Update) -> None:
-                    await self.dispatch_event(name, event)
-
-                if filters is not None:
-                    event_info = (event_type(update_event, filters), group)
-                else:
-                    event_info = (event_type(update_event), group)
-
-                self.client.add_handler(*event_info)
-                self._mevent_handlers[name] = event_info
-        elif name in self._mevent_handlers:
-            self.client.remove_handler(*self._mevent_handlers[name])
-            del self._mevent_handlers[name]
-
-    def update_module_events(self: "Caligo") -> None:
-        self.update_module_event(
-            "message",
-            MessageHandler,
-            filters=~filt.new_chat_members
-            & ~filt.left_chat_member
-            & ~filt.migrate_from_chat_id
-            & ~filt.migrate_to_chat_id,
-            group=0,
-        )
-        self.update_module_event(
-            "chat_action",
-            MessageHandler,
-            filt.new_chat_members | filt.left_chat_member,
-            group=1,
-        )
-        if self.helper_initialized:
-            self.update_helper_event("callback_query", CallbackQueryHandler)
-            self.update_helper_event("inline_query", InlineQueryHandler)
+    async def on_message_update(self: "Caligo", client: Client, msg: Message) -> None:
+        """Root handler of every message, classifying it once for all consumers."""
+
+        if self.conversations and msg.chat and msg.chat.id in self.conversations:
+            await self.feed_conversation(msg)
+
+        if msg.new_chat_members or msg.left_chat_member:
+            await self.dispatch_event("chat_action", msg)
+            return
+
+        if msg.migrate_from_chat_id or msg.migrate_to_chat_id:
+            return
+
+        if msg.outgoing and await self.match_command(client, msg):
+            await self.on_command(client, msg)
+
+        await self.dispatch_event("message", msg)
+
+    def route_helper_event(self: "Caligo", name: str) -> Callable[..., Awaitable[None]]:
+        async def update_event(_: Client, event: Update) -> None:
+            # Pages of overflowing responses are served before any listener
+            if name == "inline_query" and await self.answer_page_query(event):
+                return
+            if name == "callback_query" and await self.answer_page_callback(event):
+                return
+
+            await self.dispatch_event(name, event)
+
+        return update_event
 
     @property
     def events_activated(self: "Caligo") -> int:
-        return len(self._mevent_handlers)
+        events = MESSAGE_EVENTS
+        if self.helper_initialized:
+            events += tuple(HELPER_EVENTS)
+
+        return sum(1 for event in events if event in self.routes)
 
     @property
     def helper_initialized(self: "Caligo") -> bool:
         return hasattr(self, "client_helper") and isinstance(self.client_helper, Client)
 
     def redact_message(self: "Caligo", text: str) -> str:
-        redacted = "[REDACTED]"
-
-        api_id = str(self.config["telegram"]["api_id"])
-        api_hash = self.config["telegram"]["api_hash"]
-        db_uri = self.config["bot"]["db_uri"]
-        bot_token = self.config["telegram"]["helper"].get("token")
-
-        if api_id in text:
-            text = text.replace(api_id, redacted)
-        if api_hash in text:
-            text = text.replace(api_hash, redacted)
-        if db_uri in text:
-            text = text.replace(db_uri, redacted)
-        if bot_token is not None and bot_token in text:
-            text = text.replace(bot_token, redacted)
-
-        return text
+        return self.redactor.redact(text)
 
     async def respond(
         self: "Caligo",
@@ -302,21 +267,27 @@ class TelegramBot(CaligoBase):
         *,
         input_arg: str = "",
         mode: Optional[str] = None,
+        overflow_mode: Optional[str] = None,
         redact: bool = True,
         response: Optional[Message] = None,
         **kwargs: Any,
     ) -> Message:
         if text:
-            if redact:
+            # Oversized output is redacted while being paged or encoded instead
+            if redact and len(text) <= tg.MESSAGE_CHAR_LIMIT:
                 text = self.redact_message(text)
-
-            # send as file if text > 4096
-            if len(str(text)) > tg.MESSAGE_CHAR_LIMIT:
-                await msg.edit("Sending output as a file.")
-                response = await tg.send_as_document(text, msg, input_arg)
-
-                await msg.delete()
-                return response
+                redact = False
+
+            if len(text) > tg.MESSAGE_CHAR_LIMIT:
+                return await self.respond_overflow(
+                    msg,
+                    text,
+                    input_arg=input_arg,
+                    mode=mode,
+                    overflow_mode=overflow_mode,
+                    redact=redact,
+                    **kwargs,
+                )
 
         # Default to disabling link previews in responses
         if "disable_web_page_preview" not in kwargs:
@@ -7,18 +7,31 @@ from pyrogram.errors import MessageDeleteForbidden, MessageIdInvalid
 
 from caligo import command, listener, module, util
 from caligo.core import database
-from caligo.util.cache_limiter import CacheLimiter
+from caligo.util.rate_limit import SlidingWindowLimiter
 
 
 class Assistant(module.Module):
     name: ClassVar[str] = "Assistant"
 
     db: database.AsyncCollection
-    cache: CacheLimiter
+    cache: SlidingWindowLimiter
+
+    afk: bool
+    afk_start_time: Optional[datetime]
+    afk_strict: Optional[int]
+    afk_reason: str
 
     async def on_load(self) -> None:
         self.db = self.bot.db.get_collection(self.name.lower())
-        self.cache = CacheLimiter(ttl=60, max_value=3)
+        self.cache = SlidingWindowLimiter(limit=3, window=60)
+
+        # AFK state only changes through this module, keep it in memory
+        (
+            self.afk,
+            self.afk_start_time,
+            self.afk_strict,
+            self.afk_reason,
+        ) = await self._afk_data()
 
     async def _afk_data(self) -> Tuple[bool, Optional[datetime], Optional[int], str]:
         data = await self.db.find_one({"_id": 0})
@@ -40,6 +53,11 @@ class Assistant(module.Module):
             "strict": strict,
             "start_time": datetime.now(),
         }
+        self.afk = afk
+        self.afk_start_time = update_data["start_time"]
+        self.afk_strict = strict
+        self.afk_reason = reason or ""
+
         await self.db.update_one({"_id": 0}, {"$set": update_data}, upsert=True)
 
     async def delete_message_after(self, message: types.Message, seconds: int) -> None:
@@ -66,17 +84,17 @@ class Assistant(module.Module):
         | filters.outgoing
     )
     async def on_message(self, msg: types.Message) -> None:
-        afk, start_time, strict_msg, reason = await self._afk_data()
-
-        if not afk or msg.id == strict_msg:
+        if not self.afk or msg.id == self.afk_strict:
             return
 
+        start_time, reason = self.afk_start_time, self.afk_reason
+
         if msg.outgoing:
             await self._set_afk(False)
             await msg.reply("Welcome back!")
             return
 
-        if not await self.cache.exceeded(msg.from_user.id):
+        if self.cache.hit(msg.from_user.id):
             afk_time = util.time.format_duration_td(datetime.now() - start_time)
             reason_text = f"**Reason:** `{reason}`\n" if reason else ""
             response = (
@@ -84,4 +102,3 @@ class Assistant(module.Module):
             )
             response_msg = await msg.reply(response, quote=True)
             asyncio.create_task(self.delete_message_after(response_msg, 10))
-            await self.cache.increment(msg.from_user.id)
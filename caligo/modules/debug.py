@@ -14,6 +14,7 @@ from meval import meval
 from pyrogram.enums import ParseMode
 
 from caligo import command, module, util
+from caligo.core.database.executor import executor as db_executor
 
 var_dict = {}
 
@@ -200,6 +201,9 @@ class Debug(module.Module):
 
 Time: {el_str}"""
         if len(respond_text) > 4096:
+            if self.bot.config["bot"]["redact_responses"]:
+                out = self.bot.redact_message(out)
+
             with io.BytesIO(str.encode(out)) as out_file:
                 out_file.name = "eval.text"
                 await ctx.msg.reply_document(
@@ -212,3 +216,54 @@ Time: {el_str}"""
             respond_text,
             parse_mode=pyrogram.enums.parse_mode.ParseMode.HTML,
         )
+
+    @command.desc("Show the slowest commands and listeners")
+    @command.usage('[number of entries or "reset"?]', optional=True)
+    async def cmd_perf(self, ctx: command.Context) -> str:
+        if ctx.input == "reset":
+            self.bot.perf.reset()
+            return "__Latency histograms have been reset.__"
+
+        limit = int(ctx.input) if ctx.input.isdigit() else 10
+        top = self.bot.perf.top(limit)
+        if not top:
+            return "__No commands or listeners have been timed yet.__"
+
+        fmt = util.time.format_duration_us
+        handlers = {
+            f"{mod}.{handler} ({kind})": (
+                f"p50 {fmt(hist.percentile(50))} • "
+                f"p95 {fmt(hist.percentile(95))} • "
+                f"p99 {fmt(hist.percentile(99))} • "
+                f"max {fmt(hist.max_us)} • "
+                f"{hist.count} calls, {hist.errors} errors, "
+                f"{hist.cancelled} cancelled"
+            )
+            for (kind, mod, handler), hist in top
+        }
+
+        sched = self.bot.scheduler.stats
+        scheduler = {
+            "Queued": sched["queued"],
+            "Parked": sched["parked"],
+            "Active": sched["active"],
+            "Completed": sched["completed"],
+            "Errors": sched["errors"],
+        }
+
+        db_stats = db_executor.stats
+        db_pool = {
+            "Threads": f"{db_stats['threads']}/{db_stats['max_workers']}",
+            "Queued": db_stats["queued"],
+            "Active": db_stats["active"],
+            "Average wait": fmt(db_stats["avg_wait"] * 1000000),
+            "Max wait": fmt(db_stats["max_wait"] * 1000000),
+        }
+
+        return (
+            util.text.join_map(handlers, heading="Slowest handlers by p95")
+            + "\n\n"
+            + util.text.join_map(scheduler, heading="Listener scheduler")
+            + "\n\n"
+            + util.text.join_map(db_pool, heading="Database executor")
+        )
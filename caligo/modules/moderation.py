@@ -1,16 +1,169 @@
 import asyncio
 from datetime import datetime
-from typing import ClassVar, Optional
+from itertools import islice
+from typing import (
+    AsyncIterator,
+    ClassVar,
+    Dict,
+    Iterator,
+    List,
+    MutableMapping,
+    Optional,
+    Tuple,
+)
 
 from pyrogram.enums import ChatMembersFilter, ChatType
-from pyrogram.types import ChatMember
+from pyrogram.errors import FloodWait
+from pyrogram.types import ChatMember, Message
 
-from caligo import command, module
+from caligo import command, module, util
+
+# Maximum number of messages Telegram deletes in one request
+PURGE_BATCH_SIZE = 100
+# Number of delete requests kept in flight while purging
+PURGE_CONCURRENCY = 4
+
+# Seconds before a cached member roster is refreshed in the background
+ROSTER_TTL = 3600
+# Role flags of roster members
+ROLE_ADMIN = 1
+ROLE_BOT = 2
+
+
+class ChatRoster:
+    """Member list of one chat, kept as user IDs mapped to role flags.
+
+    Admins are always listed in full, other members only as far as some request
+    needed them unless complete is set.
+    """
+
+    members: Dict[int, int]
+    complete: bool
+    updated: int
+    refresh_task: Optional[asyncio.Task[None]]
+
+    def __init__(self, members: Dict[int, int], complete: bool) -> None:
+        self.members = members
+        self.complete = complete
+        self.updated = util.time.sec()
+        self.refresh_task = None
+
+    @property
+    def stale(self) -> bool:
+        return util.time.sec() - self.updated >= ROSTER_TTL
+
+    def user_ids(self, role: int = 0) -> Iterator[int]:
+        for user_id, flags in self.members.items():
+            if flags & role == role:
+                yield user_id
+
+    def covers(self, role: int, limit: Optional[int]) -> bool:
+        """Whether the roster holds enough members of the role for a request."""
+
+        if self.complete or role & ROLE_ADMIN:
+            return True
+
+        if limit is None:
+            return False
+
+        return sum(1 for _ in islice(self.user_ids(role), limit)) >= limit
 
 
 class Moderation(module.Module):
     name: ClassVar[str] = "Moderation"
 
+    rosters: MutableMapping[int, ChatRoster]
+
+    async def on_load(self) -> None:
+        self.rosters = {}
+
+    async def on_chat_action(self, message: Message) -> None:
+        roster = self.rosters.get(message.chat.id)
+        if roster is None:
+            return
+
+        if message.new_chat_members:
+            for user in message.new_chat_members:
+                roster.members[user.id] = ROLE_BOT if user.is_bot else 0
+        elif message.left_chat_member:
+            roster.members.pop(message.left_chat_member.id, None)
+
+    async def fetch_members(
+        self, chat_id: int, role: int = 0, limit: Optional[int] = None
+    ) -> Tuple[Dict[int, int], bool]:
+        """Fetches members of a chat, as few as needed for limit members of the role.
+
+        Admins come from their own listing, as plain member listings are capped,
+        so admin roles never page through the whole chat. Also returns whether
+        the plain listing was exhausted.
+        """
+
+        members: Dict[int, int] = {}
+        member: ChatMember
+        async for member in self.bot.client.get_chat_members(
+            chat_id, filter=ChatMembersFilter.ADMINISTRATORS
+        ):  # type: ignore
+            flags = ROLE_BOT if member.user.is_bot else 0
+            members[member.user.id] = flags | ROLE_ADMIN
+
+        if role & ROLE_ADMIN:
+            return members, False
+
+        found = sum(1 for flags in members.values() if flags & role == role)
+        if limit is not None and found >= limit:
+            return members, False
+
+        async for member in self.bot.client.get_chat_members(chat_id):  # type: ignore
+            if member.user.id in members:
+                continue
+
+            flags = ROLE_BOT if member.user.is_bot else 0
+            members[member.user.id] = flags
+            if flags & role == role:
+                found += 1
+                if limit is not None and found >= limit:
+                    return members, False
+
+        return members, True
+
+    async def refresh_roster(self, chat_id: int) -> None:
+        roster = self.rosters[chat_id]
+        try:
+            # Fetch as much as the roster held before
+            roster.members, roster.complete = await self.fetch_members(
+                chat_id, limit=None if roster.complete else len(roster.members)
+            )
+            roster.updated = util.time.sec()
+        except Exception as e:  # skipcq: PYL-W0703
+            self.log.warning("Failed to refresh members of %d", chat_id, exc_info=e)
+        finally:
+            roster.refresh_task = None
+
+    async def get_roster(
+        self, chat_id: int, role: int = 0, limit: Optional[int] = None
+    ) -> ChatRoster:
+        """Returns the cached roster of a chat, refreshing it in the background if stale.
+
+        Members are only fetched when the roster lacks limit members of the role.
+        """
+
+        roster = self.rosters.get(chat_id)
+        if roster is None:
+            roster = self.rosters[chat_id] = ChatRoster(
+                *await self.fetch_members(chat_id, role, limit)
+            )
+        elif not roster.covers(role, limit):
+            members, complete = await self.fetch_members(chat_id, role, limit)
+            roster.members.update(members)
+            roster.complete = roster.complete or complete
+            roster.updated = util.time.sec()
+        elif roster.stale and roster.refresh_task is None:
+            roster.refresh_task = self.bot.loop.create_task(
+                self.refresh_roster(chat_id)
+            )
+
+        return roster
+
     @command.desc("Mention everyone in this group (**DO NOT ABUSE**)")
     @command.usage("[comment?]", optional=True)
     async def cmd_everyone(
@@ -18,7 +171,7 @@ class Moderation(module.Module):
         ctx: command.Context,
         *,
         tag: str = "\U000e0020everyone",
-        user_filter: ChatMembersFilter = ChatMembersFilter.SEARCH,
+        role: int = 0,
     ) -> Optional[str]:
         comment = ctx.input
 
@@ -29,30 +182,95 @@ class Moderation(module.Module):
         if comment:
             mention_text += " " + comment
 
-        mention_slots = 4096 - len(mention_text)
+        mention_slots = max(0, 4096 - len(mention_text))
 
-        chat = ctx.msg.chat.id
-        member: ChatMember
-        async for member in self.bot.client.get_chat_members(
-            chat, filter=user_filter
-        ):  # type: ignore
-            mention_text += f"[\u200b](tg://user?id={member.user.id})"
-
-            mention_slots -= 1
-            if mention_slots == 0:
-                break
+        roster = await self.get_roster(ctx.msg.chat.id, role, mention_slots)
+        mentions = [
+            f"[\u200b](tg://user?id={user_id})"
+            for user_id in islice(roster.user_ids(role), mention_slots)
+        ]
+        mention_text += "".join(mentions)
 
         await ctx.respond(mention_text, mode="repost")
 
     @command.desc("Mention all admins in a group (**DO NOT ABUSE**)")
     @command.usage("[comment?]", optional=True)
     async def cmd_admin(self, ctx: command.Context) -> Optional[str]:
-        return await self.cmd_everyone(
-            ctx, tag="admin", user_filter=ChatMembersFilter.ADMINISTRATORS
-        )
+        return await self.cmd_everyone(ctx, tag="admin", role=ROLE_ADMIN)
+
+    async def purge(self, chat_id: int, batches: AsyncIterator[List[int]]) -> int:
+        """Deletes batches of messages concurrently, waiting out any FloodWait."""
+
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue[List[int]] = asyncio.Queue(PURGE_CONCURRENCY * 2)
+        resume_at = 0.0
+        purged = 0
+
+        async def worker() -> None:
+            nonlocal resume_at, purged
+
+            while True:
+                batch = await queue.get()
+                try:
+                    while True:
+                        # A FloodWait pauses every worker, not just the one hitting it
+                        delay = resume_at - loop.time()
+                        if delay > 0:
+                            await asyncio.sleep(delay)
+
+                        try:
+                            deleted = await self.bot.client.delete_messages(
+                                chat_id, batch, revoke=True
+                            )
+                        except FloodWait as e:
+                            resume_at = max(resume_at, loop.time() + e.value)  # type: ignore
+                        else:
+                            purged += deleted
+                            break
+                except Exception as e:  # skipcq: PYL-W0703
+                    self.log.warning("Failed to purge messages", exc_info=e)
+                finally:
+                    queue.task_done()
+
+        workers = [loop.create_task(worker()) for _ in range(PURGE_CONCURRENCY)]
+        try:
+            async for batch in batches:
+                await queue.put(batch)
+
+            await queue.join()
+        finally:
+            for task in workers:
+                task.cancel()
+
+            await asyncio.gather(*workers, return_exceptions=True)
+
+        return purged
+
+    async def iter_range(self, start: int, end: int) -> AsyncIterator[List[int]]:
+        for batch_start in range(start, end, PURGE_BATCH_SIZE):
+            yield list(range(batch_start, min(batch_start + PURGE_BATCH_SIZE, end)))
+
+    async def iter_history(
+        self, chat_id: int, start: int, end: int
+    ) -> AsyncIterator[List[int]]:
+        batch = []
+        message: Message
+        async for message in self.bot.client.get_chat_history(
+            chat_id, offset_id=end
+        ):  # type: ignore
+            if message.id < start:
+                break
+
+            batch.append(message.id)
+            if len(batch) == PURGE_BATCH_SIZE:
+                yield batch
+                batch = []
+
+        if batch:
+            yield batch
 
     @command.desc("reply to a message, mark as start until your purge command.")
-    @command.usage("purge", reply=True)
+    @command.usage("purge [-h: only delete messages found in chat history]", reply=True)
     async def cmd_purge(self, ctx: command.Context) -> Optional[str]:
         if not ctx.msg.reply_to_message:
             return "__Reply to a message.__"
@@ -60,25 +278,16 @@ class Moderation(module.Module):
         await ctx.respond("Purging...")
 
         time_start = datetime.now()
+        chat_id = ctx.msg.chat.id
         start, end = ctx.msg.reply_to_message.id, ctx.msg.id
-        messages_id = []
 
-        purged = 0
-        for message_id in range(start, end):
-            messages_id.append(message_id)
-            if len(messages_id) == 100:
-                purged += await ctx.bot.client.delete_messages(
-                    chat_id=ctx.msg.chat.id,
-                    message_ids=messages_id,
-                )
-                messages_id = []
-
-        if messages_id:
-            purged += await ctx.bot.client.delete_messages(
-                chat_id=ctx.msg.chat.id,
-                message_ids=messages_id,
-                revoke=True,
-            )
+        if "h" in ctx.flags:
+            # Skips IDs of messages that were never there or are already gone
+            batches = self.iter_history(chat_id, start, end)
+        else:
+            batches = self.iter_range(start, end)
+
+        purged = await self.purge(chat_id, batches)
 
         time_end = datetime.now()
         run_time = (time_end - time_start).seconds
@@ -1,4 +1,6 @@
-from typing import Any, ClassVar, Optional
+import asyncio
+from collections import Counter
+from typing import Any, ClassVar, Mapping, Optional
 
 from pyrogram.types import Message
 
@@ -8,6 +10,11 @@ from caligo.core import database
 USEC_PER_HOUR = 60 * 60 * 1000000
 USEC_PER_DAY = USEC_PER_HOUR * 24
 
+# Pending counters are written out on this interval, or earlier once this many
+# increments have piled up, which bounds how many counts a crash can lose
+FLUSH_INTERVAL = 30
+FLUSH_THRESHOLD = 200
+
 
 def _calc_pct(num1: int, num2: int) -> str:
     if not num2:
@@ -31,6 +38,17 @@ class Stats(module.Module):
     name: ClassVar[str] = "Stats"
 
     db: database.AsyncCollection
+    pending: Counter
+    flush_task: Optional[asyncio.Task]
+
+    async def snapshot(self) -> Mapping[str, Any]:
+        """Returns the stored stats merged with counts not yet flushed."""
+
+        data = dict(await self.db.find_one({"_id": 0}) or {})
+        for key, value in self.pending.items():
+            data[key] = data.get(key, 0) + value
+
+        return data
 
     async def get(self, key: str) -> Optional[Any]:
         collection = await self.db.find_one({"_id": 0})
@@ -49,8 +67,30 @@ class Stats(module.Module):
             {"_id": 0}, {"$set": {key: value}}, upsert=True
         )
 
+    async def flush(self) -> None:
+        if not self.pending:
+            return
+
+        counts, self.pending = self.pending, Counter()
+        try:
+            await self.db.update_one({"_id": 0}, {"$inc": dict(counts)}, upsert=True)
+        except Exception:
+            # Keep the counts around for the next attempt
+            self.pending.update(counts)
+            raise
+
+    async def flush_loop(self) -> None:
+        while True:
+            await asyncio.sleep(FLUSH_INTERVAL)
+            try:
+                await self.flush()
+            except Exception as e:  # skipcq: PYL-W0703
+                self.log.warning("Failed to flush stats", exc_info=e)
+
     async def on_load(self) -> None:
         self.db = self.bot.db.get_collection(self.name.upper())
+        self.pending = Counter()
+        self.flush_task = None
 
         if await self.get("stop_time_usec") or await self.get("uptime"):
             self.log.info("Migrating stats timekeeping format")
@@ -70,6 +110,16 @@ class Stats(module.Module):
         if not await self.db.find_one({"_id": 0}):
             await self.inc("start_time_usec", time_us)
 
+        if self.flush_task is None:
+            self.flush_task = self.bot.loop.create_task(self.flush_loop())
+
+    async def on_stop(self) -> None:
+        if self.flush_task is not None:
+            self.flush_task.cancel()
+            self.flush_task = None
+
+        await self.flush()
+
     async def on_message(self, msg: Message) -> None:
         stat = "sent" if msg.outgoing else "received"
         await self.bot.log_stat(stat)
@@ -86,7 +136,9 @@ class Stats(module.Module):
         await self.bot.log_stat("processed")
 
     async def on_stat_event(self, key: str) -> None:
-        await self.inc(key, 1)
+        self.pending[key] += 1
+        if sum(self.pending.values()) >= FLUSH_THRESHOLD:
+            await self.flush()
 
     async def get_start_time(self) -> int:
         return await self.get("start_time_usec") or self.bot.start_time_us
@@ -96,23 +148,25 @@ class Stats(module.Module):
     @command.alias("stat")
     async def cmd_stats(self, ctx: command.Context) -> str:
         if ctx.input == "reset":
+            self.pending.clear()
             await self.db.find_one_and_delete({"_id": 0})
-            await self.on_load()
             await self.on_start(util.time.usec())
             return "__All stats have been reset.__"
 
-        start_time: Optional[int] = await self.get("start_time_usec")
+        data = await self.snapshot()
+
+        start_time: Optional[int] = data.get("start_time_usec")
         if start_time is None:
             start_time = util.time.usec()
             await self.put("start_time_usec", start_time)
         uptime = util.time.usec() - start_time
 
-        sent: int = await self.get("sent") or 0
-        sent_stickers: int = await self.get("sent_stickers") or 0
-        recv: int = await self.get("received") or 0
-        recv_stickers: int = await self.get("received_stickers") or 0
-        processed: int = await self.get("processed") or 0
-        stickers: int = await self.get("stickers_created") or 0
+        sent: int = data.get("sent") or 0
+        sent_stickers: int = data.get("sent_stickers") or 0
+        recv: int = data.get("received") or 0
+        recv_stickers: int = data.get("received_stickers") or 0
+        processed: int = data.get("processed") or 0
+        stickers: int = data.get("stickers_created") or 0
 
         return util.text.join_map(
             {
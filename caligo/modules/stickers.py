@@ -1,15 +1,38 @@
 import asyncio
 import io
 import json
+import multiprocessing
+import uuid
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
-from typing import BinaryIO, ClassVar, Tuple, Union
+from pathlib import Path
+from typing import (
+    Any,
+    BinaryIO,
+    ClassVar,
+    List,
+    Mapping,
+    MutableMapping,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
 
 from aiopath import AsyncPath
-from PIL import Image
-from pyrogram.errors import StickersetInvalid
+from pyrogram.errors import RPCError, StickersetInvalid
 from pyrogram.raw.functions.messages.get_sticker_set import GetStickerSet
+from pyrogram.raw.functions.messages.upload_media import UploadMedia
+from pyrogram.raw.functions.stickers.add_sticker_to_set import AddStickerToSet
+from pyrogram.raw.functions.stickers.create_sticker_set import CreateStickerSet
+from pyrogram.raw.types.document_attribute_filename import DocumentAttributeFilename
+from pyrogram.raw.types.input_document import InputDocument
+from pyrogram.raw.types.input_media_uploaded_document import InputMediaUploadedDocument
+from pyrogram.raw.types.input_sticker_set_item import InputStickerSetItem
 from pyrogram.raw.types.input_sticker_set_short_name import InputStickerSetShortName
+from pyrogram.raw.types.input_user import InputUser
 from pyrogram.raw.types.sticker_set import StickerSet
+from pyrogram.types import Message
 
 from caligo import command, module, util
 from caligo.core import database
@@ -17,113 +40,224 @@ from caligo.core import database
 MAX_VIDEO_SIZE = 10485760
 MAX_SIZE = 512
 CACHE_PATH = "caligo/.cache/stickers"
+# Maximum number of stickers per pack of each type
+PACK_LIMITS = {"static": 120, "animated": 50, "video": 50}
+# Seconds before a pack's indexed sticker count is checked with Telegram again
+PACK_VERIFY_INTERVAL = 86400
+# Seconds to wait for each sticker bot response when creating a pack
+CONVERSATION_TIMEOUT = 7
+# Maximum number of messages kanged by one batch
+MAX_BATCH_SIZE = 120
+# Stickers downloaded, converted or uploaded at once in a batch
+PREPARE_CONCURRENCY = 4
+# Worker processes resizing images off the event loop
+RESIZE_WORKERS = 2
 
 # Sticker bot info and return error strings
 STICKER_BOT_USERNAME = "Stickers"
-
-
-async def resize_media(media: AsyncPath, video: bool) -> AsyncPath:
-    if video:
-        stdout, _, __ = await util.system.run_command(
-            "ffprobe",
-            "-v",
-            "error",
-            "-select_streams",
-            "v",
-            "-show_entries",
-            "stream=width,height",
-            "-of",
-            "json",
-            str(media),
-        )
-        metadata = json.loads(stdout)
-        width = round(metadata["streams"][0].get("width", 512))
-        height = round(metadata["streams"][0].get("height", 512))
-
-        if height == width:
-            height, width = 512, 512
-        elif height > width:
-            height, width = 512, -1
-        elif width > height:
-            height, width = -1, 512
-
-        resized_video = f"{CACHE_PATH}/{media.stem}.webm"
-        await util.system.run_command(
-            "ffmpeg",
-            "-i",
-            str(media),
-            "-ss",
-            "00:00:00",
-            "-to",
-            "00:00:03",
-            "-map",
-            "0:v",
-            "-b",
-            "256k",
-            "-fs",
-            "262144",
-            "-c:v",
-            "libvpx-vp9",
-            "-vf",
-            f"scale={width}:{height},fps=30",
-            resized_video,
-            "-y",
-        )
-        await media.unlink()
-        return AsyncPath(resized_video)
-
-    image: Image.Image = await util.run_sync(Image.open, str(media))
-    scale = MAX_SIZE / max(image.width, image.height)
-    image = await util.run_sync(
-        image.resize,
-        (int(image.width * scale), int(image.height * scale)),
-        Image.LANCZOS,
+FFMPEG_MISSING = (
+    "❌ [FFmpeg](https://github.com/FFmpeg/FFmpeg) "
+    "must be installed on the host system.\n\n"
+    "If you're running this bot on Heroku, "
+    "you can install FFmpeg by adding this buildpack:\n"
+    "[FFmpeg](https://github.com/jonathanong/heroku-buildpack-ffmpeg-latest)"
+)
+
+# MIME type and extension of the files uploaded for each sticker type
+STICKER_FILE_TYPES = {
+    "static": ("image/webp", ".webp"),
+    "animated": ("application/x-tgsticker", ".tgs"),
+    "video": ("video/webm", ".webm"),
+}
+
+StickerData = Union[str, BinaryIO]
+# Sticker bot conversation step, as message type, content and expected response
+Step = Tuple[str, Any, Optional[str]]
+
+
+async def resize_video(media: AsyncPath) -> AsyncPath:
+    stdout, _, __ = await util.system.run_command(
+        "ffprobe",
+        "-v",
+        "error",
+        "-select_streams",
+        "v",
+        "-show_entries",
+        "stream=width,height",
+        "-of",
+        "json",
+        str(media),
+    )
+    metadata = json.loads(stdout)
+    width = round(metadata["streams"][0].get("width", 512))
+    height = round(metadata["streams"][0].get("height", 512))
+
+    if height == width:
+        height, width = 512, 512
+    elif height > width:
+        height, width = 512, -1
+    elif width > height:
+        height, width = -1, 512
+
+    # Named after the job's own input so concurrent kangs never share an output
+    resized_video = f"{CACHE_PATH}/{media.stem}.webm"
+    await util.system.run_command(
+        "ffmpeg",
+        "-i",
+        str(media),
+        "-ss",
+        "00:00:00",
+        "-to",
+        "00:00:03",
+        "-map",
+        "0:v",
+        "-b",
+        "256k",
+        "-fs",
+        "262144",
+        "-c:v",
+        "libvpx-vp9",
+        "-vf",
+        f"scale={width}:{height},fps=30",
+        resized_video,
+        "-y",
     )
-
-    resized_photo = f"{CACHE_PATH}/sticker.png"
-    await util.run_sync(image.save, resized_photo, "PNG")
-
     await media.unlink()
-    return AsyncPath(resized_photo)
+    return AsyncPath(resized_video)
 
 
 class LengthMismatchError(Exception):
     pass
 
 
+class NativeKangError(Exception):
+    """Raised when the helper bot fails partway through filling a pack."""
+
+    added: int
+
+    def __init__(self, added: int) -> None:
+        self.added = added
+        super().__init__(f"Failed after adding {added} stickers")
+
+
 class Sticker(module.Module):
     name: ClassVar[str] = "Sticker"
 
     db: database.AsyncCollection
+    _pool: Optional[ProcessPoolExecutor]
 
     async def on_load(self):
-        # to use later maybe
+        # Index of the kang packs, keyed by set name
         self.db = self.bot.db.get_collection(self.name.upper())
 
         if not await AsyncPath(CACHE_PATH).exists():
             await AsyncPath(CACHE_PATH).mkdir(parents=True)
 
-    async def add_sticker(
+        self._pool = None
+
+    async def on_stop(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    @property
+    def pool(self) -> ProcessPoolExecutor:
+        # Started on the first resize so bots that never kang don't pay for it.
+        # Spawned rather than forked, forking would copy the loop and DB threads
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(
+                max_workers=RESIZE_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+
+        return self._pool
+
+    async def resize_image(self, media: BinaryIO, fmt: str = "PNG") -> io.BytesIO:
+        data = await self.bot.loop.run_in_executor(
+            self.pool, util.image.fit_image, media.getvalue(), MAX_SIZE, fmt  # type: ignore
+        )
+
+        sticker_buf = io.BytesIO(data)
+        sticker_buf.name = f"sticker.{fmt.lower()}"
+        return sticker_buf
+
+    @property
+    def native(self) -> bool:
+        """Whether stickers can be created by the helper bot through the API."""
+
+        return self.bot.helper_initialized
+
+    async def upload_sticker(
+        self, sticker_buf: BinaryIO, sticker_type: str
+    ) -> InputDocument:
+        """Uploads a sticker file through the helper bot for use in sticker sets."""
+
+        helper = self.bot.client_helper
+        mime_type, ext = STICKER_FILE_TYPES[sticker_type]
+
+        sticker_buf.seek(0)
+        media = await helper.invoke(
+            UploadMedia(
+                peer=await helper.resolve_peer(self.bot.user.id),
+                media=InputMediaUploadedDocument(
+                    file=await helper.save_file(sticker_buf),
+                    mime_type=mime_type,
+                    attributes=[DocumentAttributeFilename(file_name=f"sticker{ext}")],
+                ),
+            )
+        )
+
+        document = media.document
+        return InputDocument(
+            id=document.id,
+            access_hash=document.access_hash,
+            file_reference=document.file_reference,
+        )
+
+    async def create_pack_native(
         self,
-        sticker_data: Union[str, BinaryIO],
-        set_name: str,
+        document: InputDocument,
         emoji: str,
-        *,
-        target: str = STICKER_BOT_USERNAME,
-    ) -> Tuple[bool, str]:
-        commands = [
-            ("text", "/cancel", None),
-            ("text", "/addsticker", "Choose a sticker set"),
-            ("text", set_name, "Now send me the"),
-            ("file", sticker_data, "send me an emoji"),
-            ("text", emoji, "added your sticker"),
-            ("text", "/done", "done"),
-        ]
+        set_name: str,
+        set_title: str,
+    ) -> None:
+        helper = self.bot.client_helper
+        peer = await helper.resolve_peer(self.bot.user.id)
+
+        await helper.invoke(
+            CreateStickerSet(
+                user_id=InputUser(user_id=peer.user_id, access_hash=peer.access_hash),
+                title=set_title,
+                short_name=set_name,
+                stickers=[InputStickerSetItem(document=document, emoji=emoji)],
+            )
+        )
+
+    async def add_sticker_native(
+        self, document: InputDocument, emoji: str, set_name: str
+    ) -> None:
+        await self.bot.client_helper.invoke(
+            AddStickerToSet(
+                stickerset=InputStickerSetShortName(short_name=set_name),
+                sticker=InputStickerSetItem(document=document, emoji=emoji),
+            )
+        )
+
+    async def converse(
+        self, steps: Sequence[Step], *, target: str, timeout: int
+    ) -> Tuple[bool, str, int]:
+        """Walks the sticker bot through the given steps, cancelling on failure.
+
+        Also returns how many steps got their expected response.
+        """
 
         success = False
+        completed = 0
         before = datetime.now()
 
-        async with self.bot.conversation(target, timeout=25) as conv:
+        async with self.bot.conversation(
+            target, timeout=timeout, max_messages=len(steps) + 1
+        ) as conv:
 
             async def reply_and_ack():
                 # Wait for a response
@@ -134,7 +268,7 @@ class Sticker(module.Module):
                 return resp
 
             try:
-                for cmd_type, data, expected_resp in commands:
+                for cmd_type, data, expected_resp in steps:
                     if cmd_type == "text":
                         await conv.send_message(data)
                     elif cmd_type == "file":
@@ -152,7 +286,11 @@ class Sticker(module.Module):
 
                         response = resp_task.result()
                         if expected_resp and expected_resp not in response.text:
-                            return False, f'Sticker creation failed: "{response.text}"'
+                            return (
+                                False,
+                                f'Sticker creation failed: "{response.text}"',
+                                completed,
+                            )
                     except asyncio.TimeoutError:
                         after = datetime.now()
                         delta_seconds = int((after - before).total_seconds())
@@ -160,98 +298,416 @@ class Sticker(module.Module):
                         return (
                             False,
                             f"Sticker creation timed out after {delta_seconds} seconds.",
+                            completed,
                         )
 
+                    completed += 1
+
                 success = True
             finally:
                 # Cancel the operation if we return early
                 if not success:
                     await conv.send_message("/cancel")
 
-        return True, f"https://t.me/addstickers/{set_name}"
+        return True, "", completed
 
-    async def create_pack(
+    async def add_stickers(
         self,
-        sticker_data: Union[str, BinaryIO],
+        stickers: Sequence[Tuple[StickerData, str]],
+        set_name: str,
+        *,
+        target: str = STICKER_BOT_USERNAME,
+    ) -> Tuple[bool, str, int]:
+        """Adds stickers to an existing set, selecting the set only once.
+
+        Also returns how many of the stickers were added, even on failure.
+        """
+
+        steps: List[Step] = [
+            ("text", "/cancel", None),
+            ("text", "/addsticker", "Choose a sticker set"),
+            ("text", set_name, "Now send me the"),
+        ]
+        for sticker_data, emoji in stickers:
+            steps.append(("file", sticker_data, "send me an emoji"))
+            steps.append(("text", emoji, "added your sticker"))
+        steps.append(("text", "/done", "done"))
+
+        success, result, done = await self.converse(steps, target=target, timeout=25)
+        if not success:
+            # Every sticker is done once its emoji step is, after the 3 setup steps
+            return False, result, max(0, done - 3) // 2
+
+        return True, f"https://t.me/addstickers/{set_name}", len(stickers)
+
+    async def add_sticker(
+        self,
+        sticker_data: StickerData,
         set_name: str,
-        set_title: str,
         emoji: str,
         *,
-        sticker_type: str = "static",
         target: str = STICKER_BOT_USERNAME,
     ) -> Tuple[bool, str]:
+        success, result, _ = await self.add_stickers(
+            [(sticker_data, emoji)], set_name, target=target
+        )
+        return success, result
+
+    async def create_pack_with(
+        self,
+        stickers: Sequence[Tuple[StickerData, str]],
+        set_name: str,
+        set_title: str,
+        *,
+        sticker_type: str = "static",
+        target: str = STICKER_BOT_USERNAME,
+    ) -> Tuple[bool, str, int]:
+        """Creates a new set holding all the given stickers.
+
+        Also returns how many stickers were added, which is none unless the set
+        got published.
+        """
+
         sticker_types = {
             "animated": ["/newanimated", " animated "],
             "static": ["/newpack", " "],
             "video": ["/newvideo", " video "],
         }
-        commands = [
+        steps: List[Step] = [
             ("text", "/cancel", None),
             ("text", sticker_types[sticker_type][0], "Yay!"),
             ("text", set_title, f"send me the{sticker_types[sticker_type][1]}sticker"),
-            ("file", sticker_data, "send me an emoji"),
-            ("text", emoji, "/publish"),
+        ]
+        for sticker_data, emoji in stickers:
+            steps.append(("file", sticker_data, "send me an emoji"))
+            steps.append(("text", emoji, "/publish"))
+        steps += [
             ("text", "/publish", "/skip"),
             ("text", "/skip", "Animals"),
             ("text", set_name, "Kaboom!"),
         ]
 
-        success = False
-        before = datetime.now()
+        success, result, _ = await self.converse(
+            steps, target=target, timeout=CONVERSATION_TIMEOUT
+        )
+        if not success:
+            return False, result, 0
 
-        async with self.bot.conversation(target, max_messages=9) as conv:
+        return True, f"https://t.me/addstickers/{set_name}", len(stickers)
 
-            async def reply_and_ack():
-                # Wait for a response
-                resp = await conv.get_response()
-                # Ack the response to suppress its notification
-                await conv.mark_read()
+    async def create_pack(
+        self,
+        sticker_data: StickerData,
+        set_name: str,
+        set_title: str,
+        emoji: str,
+        *,
+        sticker_type: str = "static",
+        target: str = STICKER_BOT_USERNAME,
+    ) -> Tuple[bool, str]:
+        success, result, _ = await self.create_pack_with(
+            [(sticker_data, emoji)],
+            set_name,
+            set_title,
+            sticker_type=sticker_type,
+            target=target,
+        )
+        return success, result
 
-                return resp
+    def classify(self, msg: Message) -> Optional[Tuple[str, bool]]:
+        """Returns the sticker type of kangable media and whether it needs resizing."""
 
-            try:
-                for cmd_type, data, expected_resp in commands:
-                    if cmd_type == "text":
-                        await conv.send_message(data)
-                    elif cmd_type == "file":
-                        await conv.send_file(data, force_document=True)
-                    else:
-                        raise TypeError(f"Unknown command type '{cmd_type}'")
+        doc = msg.document
+        mime_type = (doc.mime_type or "") if doc else ""
 
-                    # Wait for both the rate-limit and the bot's response
-                    try:
-                        resp_task = self.bot.loop.create_task(reply_and_ack())
-                        done, _ = await asyncio.wait((resp_task,))
-                        # Raise exceptions encountered in coroutines
-                        for fut in done:
-                            fut.result()
+        if msg.sticker:
+            if not msg.sticker.file_name:
+                return None
 
-                        response = resp_task.result()
-                        if expected_resp and expected_resp not in response.text:
-                            return False, f'Sticker creation failed: "{response.text}"'
-                    except asyncio.TimeoutError:
-                        after = datetime.now()
-                        delta_seconds = int((after - before).total_seconds())
+            sticker_type = (
+                "animated"
+                if msg.sticker.is_animated
+                else "video"
+                if msg.sticker.is_video
+                else "static"
+            )
+            return sticker_type, not msg.sticker.file_name.endswith((".tgs", ".webm"))
+        if msg.photo or "image" in mime_type:
+            return "static", True
+        if "tgsticker" in mime_type:
+            return "animated", False
+        if msg.animation or ("video" in mime_type and doc.file_size <= MAX_VIDEO_SIZE):
+            return "video", True
+
+        return None
+
+    async def prepare_sticker(
+        self, msg: Message, sticker_type: str, resize: bool
+    ) -> Optional[BinaryIO]:
+        """Downloads media, resizing it into a file the sticker bot accepts."""
+
+        if sticker_type == "video" and resize:
+            # FFmpeg needs a seekable input, give each job a file of its own
+            media = await msg.download(
+                str(Path(CACHE_PATH).resolve() / uuid.uuid4().hex)
+            )
+            if not media:
+                return None
+
+            media = await resize_video(AsyncPath(media))
+            if not await media.exists():
+                return None
+
+            sticker_buf = io.BytesIO(await media.read_bytes())
+            sticker_buf.name = media.name
+            await media.unlink()
+            return sticker_buf
+
+        sticker_buf = await msg.download(in_memory=True)
+        if sticker_buf and resize:
+            # The sticker bot takes PNG files, the API only takes WEBP
+            sticker_buf = await self.resize_image(
+                sticker_buf, "WEBP" if self.native else "PNG"
+            )
 
-                        return (
-                            False,
-                            f"Sticker creation timed out after {delta_seconds} seconds.",
-                        )
+        return sticker_buf
+
+    async def kang(
+        self,
+        ctx: command.Context,
+        stickers: List[Tuple[BinaryIO, str]],
+        sticker_type: str,
+        vol: int,
+    ) -> Tuple[bool, List[str]]:
+        """Adds stickers to the kang packs of a type, from the given VOL up.
+
+        Packs are filled through the helper bot's API when it's available,
+        falling back to @Stickers sessions otherwise. Either way, filling moves
+        on to the next VOL whenever a pack runs out of room.
+        """
+
+        pending = list(stickers)
+        links: List[str] = []
+        native = self.native
+        start_vol = vol
+        while pending:
+            requested_vol = vol
+            vol, count = await self.select_pack(sticker_type, vol, native=native)
+            if vol != requested_vol:
+                await ctx.respond(
+                    f"Pack VOL {requested_vol} is full, switching to VOL {vol}..."
+                )
+
+            set_name, set_title = self.pack_name(vol, sticker_type, native=native)
+            batch = pending[: PACK_LIMITS[sticker_type] - (count or 0)]
+            for sticker_buf, _ in batch:
+                sticker_buf.seek(0)
+
+            if count is None:
+                await ctx.respond("Creating sticker pack...")
+            else:
+                await ctx.respond(
+                    "Copying sticker..."
+                    if len(batch) == 1
+                    else f"Copying {len(batch)} stickers..."
+                )
+
+            if native:
+                try:
+                    await self.kang_native(
+                        batch, sticker_type, vol, count, set_name, set_title
+                    )
+                except NativeKangError as e:
+                    self.log.warning(
+                        "Failed to kang through the helper bot, using @%s instead",
+                        STICKER_BOT_USERNAME,
+                        exc_info=e.__cause__,
+                    )
+                    for _ in range(e.added):
+                        await self.bot.log_stat("stickers_created")
+
+                    # Only the stickers that didn't make it are left
+                    if e.added:
+                        links.append(f"https://t.me/addstickers/{set_name}")
+                    del pending[: e.added]
+                    native = False
+                    vol = start_vol
+                    continue
+            else:
+                if count is None:
+                    success, result, added = await self.create_pack_with(
+                        batch, set_name, set_title, sticker_type=sticker_type
+                    )
+                else:
+                    success, result, added = await self.add_stickers(batch, set_name)
+
+                # Only what actually made it into the pack is counted
+                if added:
+                    await self.count_added(
+                        set_name, sticker_type, vol, added, created=count is None
+                    )
 
-                success = True
-            finally:
-                # Cancel the operation if we return early
                 if not success:
-                    await conv.send_message("/cancel")
+                    for _ in range(added):
+                        await self.bot.log_stat("stickers_created")
+
+                    # A timed out step may still have gone through, so have the
+                    # pack checked with Telegram on next use
+                    await self.db.update_one(
+                        {"_id": set_name}, {"$set": {"verified": 0}}
+                    )
+                    return False, [result]
+
+            for _ in batch:
+                await self.bot.log_stat("stickers_created")
+
+            del pending[: len(batch)]
+            links.append(f"https://t.me/addstickers/{set_name}")
+
+        return True, links
+
+    async def kang_native(
+        self,
+        batch: List[Tuple[BinaryIO, str]],
+        sticker_type: str,
+        vol: int,
+        count: Optional[int],
+        set_name: str,
+        set_title: str,
+    ) -> None:
+        """Creates or fills a pack through the helper bot, one API call per sticker."""
+
+        added = 0
+        try:
+            # Uploads don't touch the set, so they can all run at once
+            limit = asyncio.Semaphore(PREPARE_CONCURRENCY)
+
+            async def upload(sticker_buf: BinaryIO) -> InputDocument:
+                async with limit:
+                    return await self.upload_sticker(sticker_buf, sticker_type)
+
+            documents = await asyncio.gather(
+                *(upload(sticker_buf) for sticker_buf, _ in batch)
+            )
+
+            for document, (_, emoji) in zip(documents, batch):
+                created = count is None and not added
+                if created:
+                    await self.create_pack_native(document, emoji, set_name, set_title)
+                else:
+                    await self.add_sticker_native(document, emoji, set_name)
+
+                added += 1
+                await self.count_added(set_name, sticker_type, vol, 1, created=created)
+        except RPCError as e:
+            raise NativeKangError(added) from e
+
+    def pack_name(
+        self, vol: int, sticker_type: str, *, native: bool = False
+    ) -> Tuple[str, str]:
+        owner = self.bot.user.username or str(self.bot.user.id)
+        set_name = f"{owner}_kangPack_VOL{vol}"
+        if self.bot.user.username:
+            set_title = f"@{owner}'s Kang Set VOL.{vol}"
+        else:
+            set_title = f"{owner}'s Kang Set VOL.{vol}"
 
-        return True, f"https://t.me/addstickers/{set_name}"
+        if sticker_type == "animated":
+            set_name += "_animation"
+            set_title += " (Animation)"
+        elif sticker_type == "video":
+            set_name += "_video"
+            set_title += " (Video)"
+
+        if native:
+            # Sets created by bots have to carry the bot's username
+            set_name += f"_by_{self.bot.client_helper.me.username}"
+
+        return set_name, set_title
+
+    async def fetch_pack_count(self, set_name: str) -> Optional[int]:
+        """Returns the sticker count of a pack, or None if it doesn't exist."""
+
+        sticker: StickerSet
+        try:
+            sticker = await self.bot.client.invoke(
+                GetStickerSet(
+                    stickerset=InputStickerSetShortName(short_name=set_name), hash=0  # type: ignore
+                )
+            )
+        except StickersetInvalid:
+            await self.db.delete_one({"_id": set_name})
+            return None
+
+        return sticker.set.count  # type: ignore
+
+    async def select_pack(
+        self, sticker_type: str, vol: int, *, native: bool = False
+    ) -> Tuple[int, Optional[int]]:
+        """Finds the first pack from vol up with room left.
+
+        Returns its VOL and sticker count, which is None if it doesn't exist yet. Packs are looked up in the
+        index first, only those missing from it or not verified for a while are
+        checked with Telegram.
+        """
+
+        limit = PACK_LIMITS[sticker_type]
+        # Packs made by the helper bot and by @Stickers are numbered separately
+        known: MutableMapping[int, Mapping[str, Any]] = {
+            pack["vol"]: pack
+            async for pack in self.db.find({"type": sticker_type, "vol": {"$gte": vol}})
+            if pack["_id"]
+            == self.pack_name(pack["vol"], sticker_type, native=native)[0]
+        }
+
+        while True:
+            pack = known.get(vol)
+            if (
+                pack is None
+                or util.time.sec() - pack["verified"] >= PACK_VERIFY_INTERVAL
+            ):
+                set_name, _ = self.pack_name(vol, sticker_type, native=native)
+                count = await self.fetch_pack_count(set_name)
+                if count is None:
+                    return vol, None
+
+                pack = await self.record_pack(set_name, sticker_type, vol, count)
+
+            if pack["count"] < limit:
+                return vol, pack["count"]
+
+            vol += 1
+
+    async def record_pack(
+        self, set_name: str, sticker_type: str, vol: int, count: int
+    ) -> Mapping[str, Any]:
+        """Stores the sticker count of a pack as verified with Telegram."""
+
+        pack = {
+            "_id": set_name,
+            "type": sticker_type,
+            "vol": vol,
+            "count": count,
+            "verified": util.time.sec(),
+        }
+        await self.db.replace_one({"_id": set_name}, pack, upsert=True)
+        return pack
+
+    async def count_added(
+        self, set_name: str, sticker_type: str, vol: int, added: int, *, created: bool
+    ) -> None:
+        """Accounts for stickers just added to a pack, or the pack just created."""
+
+        if created:
+            await self.record_pack(set_name, sticker_type, vol, added)
+        else:
+            await self.db.update_one({"_id": set_name}, {"$inc": {"count": added}})
 
     @command.desc("Copy a sticker into another pack")
     @command.alias("stickercopy", "kang")
     @command.usage("[sticker pack VOL number? if not set] [emoji?]", optional=True)
     async def cmd_copysticker(self, ctx: command.Context) -> str:
         reply_msg = ctx.msg.reply_to_message
-        user = ctx.msg.from_user
 
         if not reply_msg:
             return "__Reply to a sticker to copy it.__"
@@ -259,44 +715,39 @@ class Sticker(module.Module):
         if not reply_msg.media:
             return "__Ewww can't kang that.__"
 
+        if reply_msg.sticker and not reply_msg.sticker.file_name:
+            return "__Invalid sticker.__"
+
+        kind = self.classify(reply_msg)
+        if kind is None:
+            return "__Ewww can't kang that.__"
+
         await ctx.respond("__Preparing...__")
 
-        pack_VOL = 1
-        animation = False
-        video = False
-        emoji = None
-        resize = False
+        sticker_type, resize = kind
+        pack_VOL, emoji = self.parse_kang_args(ctx)
+        if not emoji:
+            emoji = (reply_msg.sticker and reply_msg.sticker.emoji) or "❓"
 
-        if reply_msg.sticker:
-            if not reply_msg.sticker.file_name:
-                return "__Invalid sticker.__"
+        try:
+            sticker_buf = await self.prepare_sticker(reply_msg, sticker_type, resize)
+        except FileNotFoundError:
+            return FFMPEG_MISSING
 
-            if reply_msg.sticker.emoji:
-                emoji = reply_msg.sticker.emoji
+        if not sticker_buf:
+            return "__Failed to download media.__"
 
-            animation = reply_msg.sticker.is_animated
-            video = reply_msg.sticker.is_video
-            if not (
-                reply_msg.sticker.file_name.endswith(".tgs")
-                or reply_msg.sticker.file_name.endswith(".webm")
-            ):
-                resize = True
-        elif (
-            reply_msg.photo
-            or reply_msg.document
-            and "image" in reply_msg.document.mime_type
-        ):
-            resize = True
-        elif reply_msg.document and "tgsticker" in reply_msg.document.mime_type:
-            animation = True
-        elif reply_msg.animation or (
-            reply_msg.document
-            and "video" in reply_msg.document.mime_type
-            and reply_msg.document.file_size <= MAX_VIDEO_SIZE
-        ):
-            resize = True
-            video = True
+        success, result = await self.kang(
+            ctx, [(sticker_buf, emoji)], sticker_type, pack_VOL
+        )
+        if success:
+            return f"[Sticker copied]({result[0]})."
 
+        return result[0]
+
+    def parse_kang_args(self, ctx: command.Context) -> Tuple[int, Optional[str]]:
+        pack_VOL = 1
+        emoji = None
         for arg in ctx.args:
             if util.text.has_emoji(arg):
                 # Allow for emoji split across several arguments, since some clients
@@ -305,104 +756,78 @@ class Sticker(module.Module):
             else:
                 pack_VOL = int(arg)
 
-        media = await reply_msg.download()
-        if not media:
-            return "__Failed to download media.__"
-
-        media = AsyncPath(media)
-        if user.username:
-            set_name = f"{self.bot.user.username}_kangPack_VOL{pack_VOL}"
-            set_title = f"@{self.bot.user.username}'s Kang Set VOL.{pack_VOL}"
-        else:
-            set_name = f"{str(self.bot.user.id)}_kangPack_VOL{pack_VOL}"
-            set_title = f"{str(self.bot.user.id)}'s Kang Set VOL.{pack_VOL}"
+        return pack_VOL, emoji
 
-        if resize:
-            try:
-                media = await resize_media(media, video)
-            except FileNotFoundError:
-                return (
-                    "❌ [FFmpeg](https://github.com/FFmpeg/FFmpeg) "
-                    "must be installed on the host system.\n\n"
-                    "If you're running this bot on Heroku, "
-                    "you can install FFmpeg by adding this buildpack:\n"
-                    "[FFmpeg](https://github.com/jonathanong/heroku-buildpack-ffmpeg-latest)"
-                )
-            else:
-                if not await media.exists():
-                    return "__Failed to resize media.__"
+    @command.desc(
+        "Copy an album, or every message from the replied one on, into packs at once"
+    )
+    @command.alias("kangs")
+    @command.usage("[sticker pack VOL number? if not set] [emoji?]", optional=True)
+    async def cmd_batchkang(self, ctx: command.Context) -> str:
+        reply_msg = ctx.msg.reply_to_message
+        if not reply_msg:
+            return "__Reply to an album or the first message to copy.__"
 
-        if animation:
-            set_name += "_animation"
-            set_title += " (Animation)"
-        if video:
-            set_name += "_video"
-            set_title += " (Video)"
+        await ctx.respond("__Preparing...__")
 
-        while True:
-            sticker: StickerSet
-            try:
-                sticker = await self.bot.client.invoke(
-                    GetStickerSet(
-                        stickerset=InputStickerSetShortName(short_name=set_name), hash=0  # type: ignore
-                    )
+        if reply_msg.media_group_id:
+            messages = await self.bot.client.get_media_group(
+                reply_msg.chat.id, reply_msg.id
+            )
+        else:
+            ids = range(reply_msg.id, min(ctx.msg.id, reply_msg.id + MAX_BATCH_SIZE))
+            messages = await self.bot.client.get_messages(ctx.chat.id, list(ids))
+
+        pack_VOL, emoji = self.parse_kang_args(ctx)
+        jobs = []
+        for msg in messages:
+            kind = self.classify(msg) if msg and not msg.empty else None
+            if kind is not None:
+                sticker_emoji = emoji or (msg.sticker and msg.sticker.emoji) or "❓"
+                jobs.append((msg, kind, sticker_emoji))
+
+        if not jobs:
+            return "__Nothing to kang there.__"
+
+        await ctx.respond(f"__Preparing {len(jobs)} stickers...__")
+        limit = asyncio.Semaphore(PREPARE_CONCURRENCY)
+
+        async def prepare(
+            msg: Message, sticker_type: str, resize: bool
+        ) -> Optional[BinaryIO]:
+            async with limit:
+                return await self.prepare_sticker(msg, sticker_type, resize)
+
+        try:
+            prepared = await asyncio.gather(
+                *(
+                    prepare(msg, sticker_type, resize)
+                    for msg, (sticker_type, resize), _ in jobs
+                )
+            )
+        except FileNotFoundError:
+            return FFMPEG_MISSING
+
+        # Every sticker type goes to its own packs
+        batches: MutableMapping[str, List[Tuple[BinaryIO, str]]] = {}
+        for (_, (sticker_type, _), sticker_emoji), sticker_buf in zip(jobs, prepared):
+            if sticker_buf:
+                batches.setdefault(sticker_type, []).append(
+                    (sticker_buf, sticker_emoji)
                 )
-            except StickersetInvalid:
-                sticker = None  # type: ignore
-                break
-            else:
-                lim = 120 if not (animation or video) else 50
-                if sticker.set.count >= lim:  # type: ignore
-                    pack_VOL += 1
-                    if self.bot.user.username:
-                        set_name = f"{self.bot.user.username}_kangPack_VOL{pack_VOL}"
-                        set_title = (
-                            f"@{self.bot.user.username}'s Kang Set VOL.{pack_VOL}"
-                        )
-                    else:
-                        set_name = f"{str(self.bot.user.id)}_kangPack_VOL{pack_VOL}"
-                        set_title = f"{str(self.bot.user.id)}'s Kang Set VOL.{pack_VOL}"
-
-                    if animation:
-                        set_name += "_animation"
-                        set_title += " (Animated)"
-                    if video:
-                        set_name += "_video"
-                        set_title += " (Video)"
-
-                    await ctx.respond(
-                        f"Pack VOL {pack_VOL} is full, switching to next VOL..."
-                    )
-                    continue
 
-                break
+        copied = 0
+        links: List[str] = []
+        for sticker_type, stickers in batches.items():
+            success, result = await self.kang(ctx, stickers, sticker_type, pack_VOL)
+            if not success:
+                return result[0]
 
-        if not emoji:
-            emoji = "❓"
+            copied += len(stickers)
+            links += result
 
-        sticker_bytes = await media.read_bytes()
-        sticker_buf = io.BytesIO(sticker_bytes)
-        sticker_buf.seek(0)
-        sticker_buf.name = media.name
-        if not sticker:
-            await ctx.respond("Creating sticker pack...")
-            status, result = await self.create_pack(
-                sticker_buf,
-                set_name,
-                set_title,
-                emoji=emoji,
-                sticker_type="animated"
-                if animation
-                else "video"
-                if video
-                else "static",
-            )
-        else:
-            await ctx.respond("Copying sticker...")
-            status, result = await self.add_sticker(sticker_buf, set_name, emoji=emoji)
-
-        if status:
-            await self.bot.log_stat("stickers_created")
-            return f"[Sticker copied]({result})."
+        if not links:
+            return "__Failed to download media.__"
 
-        return result
+        packs = ", ".join(f"[{link.rsplit('/', 1)[-1]}]({link})" for link in links)
+        return f"Copied {copied} of {len(jobs)} stickers into {packs}."
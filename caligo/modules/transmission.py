@@ -1,70 +1,81 @@
 import asyncio
-from datetime import datetime, timedelta
-from typing import Any, ClassVar, Literal, Optional, Set, Tuple
+import mimetypes
+import os
+from datetime import datetime
+from functools import partial
+from pathlib import Path
+from typing import (
+    IO,
+    Any,
+    ClassVar,
+    Iterable,
+    List,
+    Mapping,
+    MutableMapping,
+    Optional,
+    Set,
+    Tuple,
+)
 
 from aiopath import AsyncPath
 from pyrogram import Client, types
 
 from caligo import command, module, util
+from caligo.core import database
 
+# Default number of media group items downloaded at once
+DOWNLOAD_PARALLELISM = 4
 
-async def prog_func(
-    current: int,
-    total: int,
-    start_time: int,
-    mode: Literal["upload", "download"],
-    ctx: command.Context,
-    file_name: str,
-) -> None:
-    """
-    Progress function to display upload/download progress.
-    """
-    percent = current / total
-    elapsed_time = util.time.sec() - start_time
-    now = datetime.now()
+# Size of the chunks pyrogram streams media in
+CHUNK_SIZE = 1024 * 1024
+# Number of chunks written between download checkpoints
+CHECKPOINT_CHUNKS = 16
 
-    try:
-        speed = round(current / elapsed_time, 2)
-        eta = timedelta(seconds=int(round((total - current) / speed)))
-    except ZeroDivisionError:
-        speed = 0
-        eta = timedelta(seconds=0)
-
-    # Generate progress bars
-    progress_bars = "●" * int(round(percent * 10)) + "○" * (
-        10 - int(round(percent * 10))
-    )
 
-    # Ensure the progress bar doesn't exceed 10 characters
-    if len(progress_bars) > 10:
-        progress_bars = progress_bars[:10]
-
-    status = "Uploading" if mode == "upload" else "Downloading"
-    progress_message = (
-        f"`{file_name}`\n"
-        f"Status: **{status}**\n"
-        f"Progress: [{progress_bars.ljust(10)}] {round(percent * 100)}%\n"
-        f"__{util.misc.human_readable_bytes(current)} of "
-        f"{util.misc.human_readable_bytes(total)} @ "
-        f"{util.misc.human_readable_bytes(speed, postfix='/s')}\n"
-        f"ETA - {util.time.format_duration_td(eta)}__\n\n"
-    )
+def _open_part(path: Path, offset: int) -> Tuple[IO[bytes], int]:
+    """Opens a partial download, truncated to the last complete chunk it holds."""
 
-    # Update message every 5 seconds to avoid rate limits
-    if (
-        ctx.last_update_time is None
-        or (now - ctx.last_update_time).total_seconds() >= 5
-    ):
-        await ctx.respond(progress_message)
-        ctx.last_update_time = now
+    path.parent.mkdir(parents=True, exist_ok=True)
+    try:
+        file = path.open("r+b")
+    except FileNotFoundError:
+        return path.open("wb"), 0
+
+    offset = min(offset, path.stat().st_size // CHUNK_SIZE)
+    file.truncate(offset * CHUNK_SIZE)
+    file.seek(offset * CHUNK_SIZE)
+    return file, offset
 
 
 class Transmission(module.Module):
     name: ClassVar[str] = "Transmission"
+
+    db: database.AsyncCollection
     tasks: Set[Tuple[int, asyncio.Task[Any]]]
+    progress: util.progress.ProgressManager
 
     async def on_load(self) -> None:
+        self.db = self.bot.db.get_collection(self.name.lower())
         self.tasks = set()
+        self.progress = util.progress.ProgressManager()
+
+    async def on_start(self, time_us: int) -> None:  # skipcq: PYL-W0613
+        # Pick up downloads interrupted by a restart, grouped by status message
+        groups: MutableMapping[Tuple[int, int], List[Mapping[str, Any]]] = {}
+        async for checkpoint in self.db.find({}):
+            key = (checkpoint["status_chat_id"], checkpoint["status_message_id"])
+            groups.setdefault(key, []).append(checkpoint)
+
+        for key, checkpoints in groups.items():
+            self.bot.loop.create_task(self.resume_downloads(key, checkpoints))
+
+    @property
+    def download_dir(self) -> Path:
+        return Path(self.bot.client.workdir) / "downloads"
+
+    def format_results(self, results: Iterable[Optional[str]]) -> str:
+        paths = "\n".join(f"× `{result}`" for result in results if result)
+        return paths if paths else "__Failed to download media.__"
 
     async def download_media(
         self,
@@ -76,8 +87,6 @@ class Transmission(module.Module):
         """
         Download media from a Telegram message.
         """
-        start_time = util.time.sec()
-
         # Determine whether to download a media group or a single message
         if not all_media:
             if not message.media:
@@ -91,42 +100,226 @@ class Transmission(module.Module):
             except ValueError:
                 msg_list = [message]
 
-        results = set()
+        items = []
+        names = set()
         for msg in msg_list:
-            media = getattr(msg, msg.media.value, None)
+            media = getattr(msg, msg.media.value, None) if msg.media else None
             if not media:
                 continue
 
-            name = getattr(
-                media,
-                "file_name",
-                f"{msg.media.value}_{getattr(media, 'date', datetime.now()).strftime('%Y-%m-%d_%H-%M-%S')}",
-            )
+            name = getattr(media, "file_name", None)
+            if not name:
+                date = getattr(media, "date", None) or datetime.now()
+                ext = ".jpg" if msg.media.value == "photo" else ""
+                if not ext and getattr(media, "mime_type", None):
+                    ext = mimetypes.guess_extension(media.mime_type) or ""
+
+                # Album items share their date, the message ID keeps them apart
+                name = (
+                    f"{msg.media.value}_{date.strftime('%Y-%m-%d_%H-%M-%S')}"
+                    f"_{msg.id}{ext}"
+                )
+            elif name in names:
+                # Same for documents in one group sharing a file name
+                name = f"{msg.id}_{name}"
+
+            names.add(name)
+            items.append((msg, name))
+
+        if not items:
+            return "__Failed to download media: No media found.__"
 
-            # Create a task to download each media message
-            task = self.bot.loop.create_task(
-                self.bot.client.download_media(
-                    msg,
-                    progress=prog_func,
-                    progress_args=(start_time, "download", ctx, name),
+        status = ctx.response or ctx.msg
+        key = (status.chat.id, status.id)
+
+        # The whole group is tracked as one task so aborting it cancels every item
+        task = self.bot.loop.create_task(self.download_group(key, ctx.respond, items))
+        self.tasks.add((ctx.msg.id, task))
+        try:
+            results = await task
+        except asyncio.CancelledError:
+            # Only a shutdown leaves the checkpoints for the next start to resume
+            if not self.bot.stopping:
+                await self.discard_checkpoints(items)
+
+            return "__Transmission aborted.__"
+        except Exception:
+            await self.discard_checkpoints(items)
+            raise
+        finally:
+            self.tasks.discard((ctx.msg.id, task))
+
+        return self.format_results(results)
+
+    async def resume_downloads(
+        self, key: Tuple[int, int], checkpoints: List[Mapping[str, Any]]
+    ) -> None:
+        """
+        Resume downloads interrupted by a restart on their old status message.
+        """
+        chat_id, status_id = key
+        edit = partial(self.bot.client.edit_message_text, chat_id, status_id)
+
+        items = []
+        for checkpoint in checkpoints:
+            try:
+                msg = await self.bot.client.get_messages(
+                    checkpoint["chat_id"], checkpoint["message_id"]
                 )
+            except Exception as e:  # skipcq: PYL-W0703
+                # Keep the checkpoint around to try again on the next start
+                self.log.warning("Failed to fetch interrupted download", exc_info=e)
+                continue
+
+            if not msg or msg.empty or not msg.media:
+                await self.db.delete_one({"_id": checkpoint["_id"]})
+                continue
+
+            items.append((msg, Path(checkpoint["path"]).name))
+
+        if not items:
+            return
+
+        self.log.info("Resuming %d interrupted download(s)", len(items))
+        task = self.bot.loop.create_task(self.download_group(key, edit, items))
+        self.tasks.add((status_id, task))
+        try:
+            text = self.format_results(await task)
+        except asyncio.CancelledError:
+            if self.bot.stopping:
+                return
+
+            await self.discard_checkpoints(items)
+            text = "__Transmission aborted.__"
+        except Exception as e:  # skipcq: PYL-W0703
+            # Resuming it again on every start would fail the same way
+            self.log.error("Failed to resume downloads", exc_info=e)
+            await self.discard_checkpoints(items)
+            text = f"__Failed to resume download: {e}__"
+        finally:
+            self.tasks.discard((status_id, task))
+
+        try:
+            await edit(text)
+        except Exception as e:  # skipcq: PYL-W0703
+            self.log.warning("Failed to update resumed download status", exc_info=e)
+
+    async def download_group(
+        self,
+        key: Tuple[int, int],
+        edit: util.progress.EditFunc,
+        items: List[Tuple[types.Message, str]],
+    ) -> List[Any]:
+        """
+        Download every item of a media group concurrently.
+        """
+        limit = asyncio.Semaphore(
+            self.bot.config["bot"].get("download_parallelism", DOWNLOAD_PARALLELISM)
+        )
+
+        async def download(msg: types.Message, name: str) -> Any:
+            # Registered up front so items waiting for a slot still count
+            transfer = self.progress.track(
+                key,
+                edit,
+                name,
+                "download",
+                getattr(getattr(msg, msg.media.value), "file_size", None) or 0,
             )
-            self.tasks.add((ctx.msg.id, task))
             try:
-                await task
-            except asyncio.CancelledError:
-                return "__Transmission aborted.__"
-            else:
-                self.tasks.remove((ctx.msg.id, task))
-                results.add((msg.id, task.result()))
-
-        paths = "\n".join(
-            f"× `{self.bot.client.workdir}/downloads/{result.split('/')[-1] if isinstance(result, str) else result.name}`"
-            for msg_id, result in results
-            if result
-        )
+                async with limit:
+                    return await self.download_file(key, msg, name, transfer)
+            finally:
+                self.progress.finish(key, transfer)
 
-        return paths if paths else "__Failed to download media.__"
+        tasks = [self.bot.loop.create_task(download(msg, name)) for msg, name in items]
+        try:
+            return await asyncio.gather(*tasks)
+        except BaseException:
+            # Either aborted or one item failed, don't leave the rest running
+            for task in tasks:
+                task.cancel()
+
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+
+    async def download_file(
+        self,
+        key: Tuple[int, int],
+        msg: types.Message,
+        name: str,
+        transfer: util.progress.Transfer,
+    ) -> str:
+        """
+        Stream media to disk in chunks, checkpointing so restarts can resume it.
+        """
+        media = getattr(msg, msg.media.value)
+        size: int = getattr(media, "file_size", None) or 0
+        path = self.download_dir / name
+        part = path.with_name(path.name + ".part")
+
+        checkpoint = await self.db.find_one({"_id": media.file_unique_id})
+        offset = 0
+        if checkpoint is not None and checkpoint["path"] == str(path):
+            offset = checkpoint["offset"]
+
+        file, offset = await util.run_sync(_open_part, part, offset)
+        try:
+            await self.db.update_one(
+                {"_id": media.file_unique_id},
+                {
+                    "$set": {
+                        "chat_id": msg.chat.id,
+                        "message_id": msg.id,
+                        "status_chat_id": key[0],
+                        "status_message_id": key[1],
+                        "path": str(path),
+                        "size": size,
+                        "offset": offset,
+                    }
+                },
+                upsert=True,
+            )
+
+            transfer.current = offset * CHUNK_SIZE
+            async for chunk in self.bot.client.stream_media(msg, offset=offset):
+                await util.run_sync(file.write, chunk)
+                offset += 1
+                transfer.current += len(chunk)
+
+                # Only count parts that have actually reached the disk
+                if offset % CHECKPOINT_CHUNKS == 0:
+                    await util.run_sync(file.flush)
+                    await self.db.update_one(
+                        {"_id": media.file_unique_id}, {"$set": {"offset": offset}}
+                    )
+        finally:
+            await util.run_sync(file.close)
+
+        written = (await util.run_sync(part.stat)).st_size
+        await self.db.delete_one({"_id": media.file_unique_id})
+        if size and written != size:
+            await util.run_sync(part.unlink)
+            raise RuntimeError(
+                f"Downloaded size of '{name}' doesn't match, expected {size} bytes "
+                f"but got {written}"
+            )
+
+        await util.run_sync(os.replace, part, path)
+        return str(path)
+
+    async def discard_checkpoints(
+        self, items: Iterable[Tuple[types.Message, str]]
+    ) -> None:
+        for msg, name in items:
+            media = getattr(msg, msg.media.value)
+            await self.db.delete_one({"_id": media.file_unique_id})
+            try:
+                await util.run_sync(
+                    (self.download_dir / f"{name}.part").unlink, missing_ok=True
+                )
+            except OSError:
+                pass
 
     async def upload_file(
         self,
@@ -244,7 +437,6 @@ class Transmission(module.Module):
         if not ctx.segments and not ctx.flags.get("f"):
             return "__Pass the file path.__"
 
-        start_time = util.time.sec()
         file_path = None
         del_path = False
         caption = ""
@@ -265,6 +457,8 @@ class Transmission(module.Module):
 
         caption = ctx.flags.get("c", "")
 
+        key = (ctx.msg.chat.id, ctx.msg.id)
+        transfer = self.progress.track(key, ctx.respond, file_path.name, "upload")
         task = self.bot.loop.create_task(
             self.upload_file(
                 ctx,
@@ -272,10 +466,7 @@ class Transmission(module.Module):
                 del_path=del_path,
                 caption=caption,
                 thumb=None,  # Set thumb as per your requirements
-                extra={
-                    "progress": prog_func,
-                    "progress_args": (start_time, "upload", ctx, file_path.name),
-                },
+                extra={"progress": transfer.update},
             )
         )
         self.tasks.add((ctx.msg.id, task))
@@ -285,5 +476,7 @@ class Transmission(module.Module):
             return "__Transmission aborted.__"
         else:
             self.tasks.remove((ctx.msg.id, task))
+        finally:
+            self.progress.finish(key, transfer)
 
         await ctx.msg.delete()
@@ -1,10 +1,15 @@
 # skipcq: PY-W2000
 from . import (
     async_helpers,
-    cache_limiter,
     error,
     git,
+    image,
     misc,
+    overflow,
+    perf,
+    progress,
+    rate_limit,
+    redact,
     system,
     text,
     tg,
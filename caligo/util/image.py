@@ -0,0 +1,31 @@
+import io
+
+from PIL import Image
+
+# Resample in steps no smaller than this multiple of the target size, as in Image.thumbnail
+REDUCING_GAP = 2.0
+
+
+def fit_image(data: bytes, max_size: int, fmt: str = "PNG") -> bytes:
+    """Scales an encoded image so its longest side is max_size, re-encoding it as fmt.
+
+    Meant to be run in a worker process. Large JPEGs are downscaled by the decoder
+    itself through draft mode and other formats are reduced by an integer factor
+    before the final resample, so the full-resolution image is never filtered.
+    """
+
+    with Image.open(io.BytesIO(data)) as image:
+        scale = max_size / max(image.width, image.height)
+        size = (round(image.width * scale), round(image.height * scale))
+
+        # Only has an effect on JPEG, where it must be set before loading
+        image.draft(None, (int(size[0] * REDUCING_GAP), int(size[1] * REDUCING_GAP)))
+        if image.mode not in ("RGB", "RGBA"):
+            image = image.convert("RGBA")
+
+        resized = image.resize(size, Image.LANCZOS, reducing_gap=REDUCING_GAP)
+
+    output = io.BytesIO()
+    # Lossless so WEBP doesn't degrade anything compared to PNG
+    resized.save(output, fmt, lossless=True)
+    return output.getvalue()
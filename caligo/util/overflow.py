@@ -0,0 +1,176 @@
+import copy
+import gzip
+import html
+import io
+import time
+import uuid
+from collections import OrderedDict
+from typing import List, Optional, Sequence, Tuple
+
+import pyrogram
+from pyrogram.enums import MessageEntityType, ParseMode
+from pyrogram.parser import utils as parser_utils
+from pyrogram.parser.html import HTML
+from pyrogram.types import MessageEntity
+
+from .redact import Redactor
+
+# Characters encoded per step when building documents, bounding temporary copies
+DOCUMENT_CHUNK_SIZE = 1 << 16
+COMPRESS_LEVEL = 6
+
+
+def _page_html(text: str, entities: Sequence[MessageEntity]) -> str:
+    # HTML.unparse leaves text outside the outermost entities unescaped
+    if not entities:
+        return html.escape(parser_utils.remove_surrogates(text))
+
+    start = min(entity.offset for entity in entities)
+    end = max(entity.offset + entity.length for entity in entities)
+    for entity in entities:
+        entity.offset -= start
+
+    return (
+        html.escape(parser_utils.remove_surrogates(text[:start]))
+        + HTML.unparse(parser_utils.remove_surrogates(text[start:end]), list(entities))
+        + html.escape(parser_utils.remove_surrogates(text[end:]))
+    )
+
+
+async def paginate(
+    client: pyrogram.Client,
+    text: str,
+    parse_mode: Optional[ParseMode] = None,
+    limit: int = 4096,
+) -> List[str]:
+    """Splits formatted text into pages of at most limit characters each.
+
+    The text is parsed once and split on the plain content, preferring line
+    breaks, with entities clipped to every page. Pages are returned as HTML so
+    formatting spanning a page boundary stays valid on both sides.
+    """
+
+    parsed = await client.parser.parse(text, parse_mode)
+    entities = [
+        entity
+        for entity in (
+            MessageEntity._parse(client, raw, {})  # skipcq: PYL-W0212
+            for raw in parsed["entities"] or ()
+        )
+        if entity is not None
+        and not (entity.type == MessageEntityType.TEXT_MENTION and entity.user is None)
+    ]
+
+    # Offsets of entities are in UTF-16 code units, as is this representation
+    content = parser_utils.add_surrogates(parsed["message"])
+
+    pages = []
+    start = 0
+    while start < len(content):
+        end = start + limit
+        if end < len(content):
+            newline = content.rfind("\n", start + limit // 2, end)
+            if newline != -1:
+                end = newline + 1
+            elif "\ud800" <= content[end - 1] <= "\udbff":
+                # Don't split a surrogate pair
+                end -= 1
+        else:
+            end = len(content)
+
+        clipped = []
+        for entity in entities:
+            entity_start = max(entity.offset, start)
+            entity_end = min(entity.offset + entity.length, end)
+            if entity_end > entity_start:
+                clip = copy.copy(entity)
+                clip.offset = entity_start - start
+                clip.length = entity_end - entity_start
+                clipped.append(clip)
+
+        pages.append(_page_html(content[start:end], clipped))
+        start = end
+
+    return pages
+
+
+def build_document(
+    text: str,
+    *,
+    compress: bool = False,
+    redactor: Optional[Redactor] = None,
+    chunk_size: int = DOCUMENT_CHUNK_SIZE,
+) -> io.BytesIO:
+    """Encodes text into an in-memory document, optionally gzip-compressed.
+
+    The text is redacted, encoded and compressed chunk by chunk in one pass, so
+    the full encoded output is never held alongside the text. Meant to be run
+    on a thread for large inputs.
+    """
+
+    output = io.BytesIO()
+    stream = redactor.stream() if redactor is not None else None
+    sink = (
+        gzip.GzipFile(fileobj=output, mode="wb", compresslevel=COMPRESS_LEVEL, mtime=0)
+        if compress
+        else output
+    )
+
+    try:
+        for start in range(0, len(text), chunk_size):
+            chunk = text[start : start + chunk_size]
+            if stream is not None:
+                chunk = stream.feed(chunk)
+
+            sink.write(chunk.encode())
+
+        if stream is not None:
+            sink.write(stream.flush().encode())
+    finally:
+        # Only finishes the gzip stream, the underlying buffer stays open
+        if sink is not output:
+            sink.close()
+
+    output.name = str(uuid.uuid4()).split("-")[0].upper() + (
+        ".TXT.GZ" if compress else ".TXT"
+    )
+    output.seek(0)
+    return output
+
+
+class PageCache:
+    """In-memory store of paged responses, evicting the oldest once full or expired."""
+
+    max_entries: int
+    ttl: float
+
+    _entries: "OrderedDict[str, Tuple[Tuple[str, ...], float]]"
+
+    def __init__(self, max_entries: int = 64, ttl: float = 3600) -> None:
+        self.max_entries = max_entries
+        self.ttl = ttl
+
+        self._entries = OrderedDict()
+
+    def put(self, pages: Sequence[str]) -> str:
+        key = uuid.uuid4().hex[:12]
+        self._entries[key] = (tuple(pages), time.monotonic() + self.ttl)
+        if len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+        return key
+
+    def get(self, key: str) -> Optional[Sequence[str]]:
+        try:
+            pages, expires = self._entries[key]
+        except KeyError:
+            return None
+
+        if expires <= time.monotonic():
+            del self._entries[key]
+            return None
+
+        return pages
+
+    def __len__(self) -> int:
+        return len(self._entries)
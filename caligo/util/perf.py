@@ -0,0 +1,135 @@
+import asyncio
+import bisect
+import time
+from contextlib import contextmanager
+from typing import Iterator, List, MutableMapping, Sequence, Tuple
+
+
+def _make_bounds(lowest: int, highest: int, growth: float) -> Sequence[int]:
+    bounds = [lowest]
+    while bounds[-1] < highest:
+        bounds.append(max(bounds[-1] + 1, int(bounds[-1] * growth)))
+
+    return tuple(bounds)
+
+
+# Microsecond bucket upper bounds from 10μs to ~2min, each ~20% wider than the last
+BUCKET_BOUNDS = _make_bounds(10, 120 * 1000000, 1.2)
+
+Key = Tuple[str, str, str]
+
+
+class LatencyHistogram:
+    """Fixed-bucket latency histogram, recording in microseconds.
+
+    Recording is a single bisect over precomputed bounds, so percentiles are
+    approximated to the upper bound of the bucket they fall in.
+    """
+
+    counts: List[int]
+    count: int
+    errors: int
+    cancelled: int
+    total_us: int
+    max_us: int
+
+    def __init__(self) -> None:
+        self.counts = [0] * (len(BUCKET_BOUNDS) + 1)
+        self.count = 0
+        self.errors = 0
+        self.cancelled = 0
+        self.total_us = 0
+        self.max_us = 0
+
+    def record(
+        self, elapsed_us: int, error: bool = False, cancelled: bool = False
+    ) -> None:
+        self.counts[bisect.bisect_left(BUCKET_BOUNDS, elapsed_us)] += 1
+        self.count += 1
+        self.total_us += elapsed_us
+        if elapsed_us > self.max_us:
+            self.max_us = elapsed_us
+        if error:
+            self.errors += 1
+        if cancelled:
+            self.cancelled += 1
+
+    def percentile(self, pct: float) -> int:
+        """Returns the approximate latency in microseconds at the given percentile."""
+
+        if not self.count:
+            return 0
+
+        target = self.count * pct / 100
+        seen = 0
+        for idx, bucket in enumerate(self.counts):
+            seen += bucket
+            if seen >= target:
+                if idx == len(BUCKET_BOUNDS):
+                    return self.max_us
+
+                return min(BUCKET_BOUNDS[idx], self.max_us)
+
+        return self.max_us
+
+    @property
+    def mean_us(self) -> int:
+        return self.total_us // self.count if self.count else 0
+
+
+class PerfRegistry:
+    """Histograms of handler latencies keyed by kind, module and handler name."""
+
+    histograms: MutableMapping[Key, LatencyHistogram]
+
+    def __init__(self) -> None:
+        self.histograms = {}
+
+    def record(
+        self,
+        kind: str,
+        mod: str,
+        handler: str,
+        elapsed_us: int,
+        error: bool = False,
+        cancelled: bool = False,
+    ) -> None:
+        key = (kind, mod, handler)
+        try:
+            hist = self.histograms[key]
+        except KeyError:
+            hist = self.histograms[key] = LatencyHistogram()
+
+        hist.record(elapsed_us, error, cancelled)
+
+    @contextmanager
+    def measure(self, kind: str, mod: str, handler: str) -> Iterator[None]:
+        """Times the wrapped block, counting it as an error or cancel if it raises."""
+
+        before = time.perf_counter_ns()
+        error = cancelled = False
+        try:
+            yield
+        except asyncio.CancelledError:
+            cancelled = True
+            raise
+        except BaseException:
+            error = True
+            raise
+        finally:
+            elapsed_us = (time.perf_counter_ns() - before) // 1000
+            self.record(kind, mod, handler, elapsed_us, error, cancelled)
+
+    def top(
+        self, limit: int = 10, pct: float = 95
+    ) -> Sequence[Tuple[Key, LatencyHistogram]]:
+        """Returns the slowest handlers ordered by the given percentile."""
+
+        return sorted(
+            self.histograms.items(),
+            key=lambda item: item[1].percentile(pct),
+            reverse=True,
+        )[:limit]
+
+    def reset(self) -> None:
+        self.histograms.clear()
@@ -0,0 +1,176 @@
+import asyncio
+import logging
+import time
+from datetime import timedelta
+from typing import Any, Awaitable, Callable, Hashable, List, Literal, MutableMapping
+
+from pyrogram.errors import FloodWait, MessageNotModified
+
+from .misc import human_readable_bytes
+from .time import format_duration_td
+
+Mode = Literal["upload", "download"]
+EditFunc = Callable[[str], Awaitable[Any]]
+
+# Seconds between status message edits, the interval doubles on every FloodWait
+UPDATE_INTERVAL = 5
+MAX_UPDATE_INTERVAL = 60
+
+log = logging.getLogger(__name__)
+
+
+class Transfer:
+    """Raw byte counters of one upload or download."""
+
+    __slots__ = ("name", "mode", "current", "total", "start_time", "done")
+
+    name: str
+    mode: Mode
+    current: int
+    total: int
+    start_time: float
+    done: bool
+
+    def __init__(self, name: str, mode: Mode, total: int = 0) -> None:
+        self.name = name
+        self.mode = mode
+        self.current = 0
+        self.total = total
+        self.start_time = time.monotonic()
+        self.done = False
+
+    async def update(self, current: int, total: int) -> None:
+        """Pyrogram progress callback, only stores the counters."""
+
+        self.current = current
+        self.total = total
+
+
+def render(
+    name: str,
+    mode: Mode,
+    current: int,
+    total: int,
+    elapsed: float,
+    files: str = "",
+) -> str:
+    percent = current / total if total else 0
+    speed = current / elapsed if elapsed > 0 else 0
+    eta = timedelta(seconds=int(round((total - current) / speed)) if speed else 0)
+
+    filled = min(10, int(round(percent * 10)))
+    progress_bars = "●" * filled + "○" * (10 - filled)
+    status = "Uploading" if mode == "upload" else "Downloading"
+
+    return (
+        f"`{name}`\n"
+        f"Status: **{status}**\n"
+        f"{files}"
+        f"Progress: [{progress_bars}] {round(percent * 100)}%\n"
+        f"__{human_readable_bytes(current)} of "
+        f"{human_readable_bytes(total)} @ "
+        f"{human_readable_bytes(speed, postfix='/s')}\n"
+        f"ETA - {format_duration_td(eta)}__\n\n"
+    )
+
+
+class ProgressStatus:
+    """All transfers reported through one status message, rendered on one timer."""
+
+    edit: EditFunc
+    interval: float
+    transfers: List[Transfer]
+
+    _last_text: str
+    _task: "asyncio.Task[None]"
+
+    def __init__(self, edit: EditFunc, interval: float = UPDATE_INTERVAL) -> None:
+        self.edit = edit
+        self.interval = interval
+        self.transfers = []
+
+        self._last_text = ""
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    @property
+    def finished(self) -> bool:
+        return all(transfer.done for transfer in self.transfers)
+
+    def render(self) -> str:
+        transfers = self.transfers
+        if len(transfers) == 1:
+            transfer = transfers[0]
+            return render(
+                transfer.name,
+                transfer.mode,
+                transfer.current,
+                transfer.total,
+                time.monotonic() - transfer.start_time,
+            )
+
+        done = sum(1 for transfer in transfers if transfer.done)
+        return render(
+            f"{len(transfers)} files",
+            transfers[0].mode,
+            sum(transfer.current for transfer in transfers),
+            sum(transfer.total for transfer in transfers),
+            time.monotonic() - min(transfer.start_time for transfer in transfers),
+            files=f"Files: {done} of {len(transfers)}\n",
+        )
+
+    async def _run(self) -> None:
+        while not self.finished:
+            text = self.render()
+            if text != self._last_text:
+                try:
+                    await self.edit(text)
+                except FloodWait as e:
+                    self.interval = min(self.interval * 2, MAX_UPDATE_INTERVAL)
+                    await asyncio.sleep(e.value)  # type: ignore
+                    continue
+                except MessageNotModified:
+                    pass
+                except Exception as e:  # skipcq: PYL-W0703
+                    # Progress is cosmetic, never let it break the transfer
+                    log.warning("Failed to update progress", exc_info=e)
+
+                self._last_text = text
+
+            await asyncio.sleep(self.interval)
+
+    def close(self) -> None:
+        self._task.cancel()
+
+
+class ProgressManager:
+    """Tracks transfers, merging those sharing a key into one status message."""
+
+    statuses: MutableMapping[Hashable, ProgressStatus]
+
+    def __init__(self) -> None:
+        self.statuses = {}
+
+    def track(
+        self,
+        key: Hashable,
+        edit: EditFunc,
+        name: str,
+        mode: Mode,
+        total: int = 0,
+    ) -> Transfer:
+        try:
+            status = self.statuses[key]
+        except KeyError:
+            status = self.statuses[key] = ProgressStatus(edit)
+
+        transfer = Transfer(name, mode, total)
+        status.transfers.append(transfer)
+        return transfer
+
+    def finish(self, key: Hashable, transfer: Transfer) -> None:
+        transfer.done = True
+
+        status = self.statuses.get(key)
+        if status is not None and status.finished:
+            status.close()
+            del self.statuses[key]
@@ -0,0 +1,137 @@
+import time
+from collections import OrderedDict, deque
+from typing import Deque, Generic, Hashable, List, TypeVar
+
+State = TypeVar("State")
+
+
+class RateLimiter(Generic[State]):
+    """Base class of in-memory rate limiters keyed by user, chat or anything hashable.
+
+    State is kept per key in an LRU map capped at max_keys, evicting the least
+    recently seen key once full. Expiry is computed lazily on access, so there
+    are no timers or background tasks per key.
+    """
+
+    max_keys: int
+
+    _states: "OrderedDict[Hashable, State]"
+
+    def __init__(self, max_keys: int = 4096) -> None:
+        self.max_keys = max_keys
+
+        self._states = OrderedDict()
+
+    def _new_state(self, now: float) -> State:
+        raise NotImplementedError
+
+    def _state(self, key: Hashable, now: float) -> State:
+        try:
+            state = self._states[key]
+        except KeyError:
+            state = self._states[key] = self._new_state(now)
+            if len(self._states) > self.max_keys:
+                self._states.popitem(last=False)
+        else:
+            self._states.move_to_end(key)
+
+        return state
+
+    def _exceeded(self, state: State, now: float) -> bool:
+        raise NotImplementedError
+
+    def _consume(self, state: State, now: float) -> None:
+        raise NotImplementedError
+
+    def exceeded(self, key: Hashable) -> bool:
+        """Checks whether the key is currently rate limited, without counting a hit."""
+
+        now = time.monotonic()
+        return self._exceeded(self._state(key, now), now)
+
+    def increment(self, key: Hashable) -> None:
+        """Counts a hit for the key regardless of whether it's limited."""
+
+        now = time.monotonic()
+        self._consume(self._state(key, now), now)
+
+    def hit(self, key: Hashable) -> bool:
+        """Counts a hit if the key isn't limited, returning whether it was allowed."""
+
+        now = time.monotonic()
+        state = self._state(key, now)
+        if self._exceeded(state, now):
+            return False
+
+        self._consume(state, now)
+        return True
+
+    def reset(self, key: Hashable) -> None:
+        self._states.pop(key, None)
+
+    def clear(self) -> None:
+        self._states.clear()
+
+    def __len__(self) -> int:
+        return len(self._states)
+
+
+class SlidingWindowLimiter(RateLimiter[Deque[float]]):
+    """Allows at most limit hits within any window seconds long.
+
+    Every key keeps a log of its hit times, which never grows beyond limit
+    entries. Old entries are dropped from the front as they expire, making each
+    check amortized O(1).
+    """
+
+    limit: int
+    window: float
+
+    def __init__(self, limit: int, window: float, *, max_keys: int = 4096) -> None:
+        super().__init__(max_keys)
+
+        self.limit = limit
+        self.window = window
+
+    def _new_state(self, now: float) -> Deque[float]:
+        return deque(maxlen=self.limit)
+
+    def _exceeded(self, state: Deque[float], now: float) -> bool:
+        threshold = now - self.window
+        while state and state[0] <= threshold:
+            state.popleft()
+
+        return len(state) >= self.limit
+
+    def _consume(self, state: Deque[float], now: float) -> None:
+        state.append(now)
+
+
+class TokenBucketLimiter(RateLimiter[List[float]]):
+    """Allows bursts of up to capacity hits, refilling at rate tokens per second."""
+
+    capacity: float
+    rate: float
+
+    def __init__(self, capacity: float, rate: float, *, max_keys: int = 4096) -> None:
+        super().__init__(max_keys)
+
+        self.capacity = capacity
+        self.rate = rate
+
+    def _new_state(self, now: float) -> List[float]:
+        # [tokens, last refill time]
+        return [self.capacity, now]
+
+    def _refill(self, state: List[float], now: float) -> None:
+        tokens, last = state
+        state[0] = min(self.capacity, tokens + (now - last) * self.rate)
+        state[1] = now
+
+    def _exceeded(self, state: List[float], now: float) -> bool:
+        self._refill(state, now)
+        return state[0] < 1
+
+    def _consume(self, state: List[float], now: float) -> None:
+        self._refill(state, now)
+        state[0] -= 1
@@ -0,0 +1,120 @@
+import re
+from typing import Iterable, Iterator, List, Optional, Pattern, Set
+
+REDACTED = "[REDACTED]"
+
+
+class Redactor:
+    """Replaces every registered secret in a single pass over the text.
+
+    Secrets are compiled into one regex alternation, longest first so a secret
+    containing another is replaced whole. The pattern is only rebuilt when the
+    set of secrets changes, never per call.
+    """
+
+    replacement: str
+
+    _secrets: Set[str]
+    _pattern: Optional[Pattern[str]]
+    _longest: int
+
+    def __init__(self, replacement: str = REDACTED) -> None:
+        self.replacement = replacement
+
+        self._secrets = set()
+        self._pattern = None
+        self._longest = 0
+
+    def _compile(self) -> None:
+        if not self._secrets:
+            self._pattern = None
+            self._longest = 0
+            return
+
+        secrets = sorted(self._secrets, key=len, reverse=True)
+        self._pattern = re.compile("|".join(map(re.escape, secrets)))
+        self._longest = len(secrets[0])
+
+    def add(self, *secrets: Optional[str]) -> None:
+        """Registers secrets to redact, empty and None values are ignored."""
+
+        new = {str(secret) for secret in secrets if secret} - self._secrets
+        if new:
+            self._secrets |= new
+            self._compile()
+
+    def remove(self, *secrets: str) -> None:
+        old = self._secrets & {str(secret) for secret in secrets}
+        if old:
+            self._secrets -= old
+            self._compile()
+
+    def redact(self, text: str) -> str:
+        if self._pattern is None:
+            return text
+
+        return self._pattern.sub(self.replacement, text)
+
+    def stream(self) -> "RedactStream":
+        """Returns a stateful redactor for text arriving in chunks."""
+
+        return RedactStream(self)
+
+    def redact_chunks(self, chunks: Iterable[str]) -> Iterator[str]:
+        stream = self.stream()
+        for chunk in chunks:
+            redacted = stream.feed(chunk)
+            if redacted:
+                yield redacted
+
+        tail = stream.flush()
+        if tail:
+            yield tail
+
+
+class RedactStream:
+    """Redacts chunked text, holding back just enough to catch split secrets.
+
+    A secret can only start in the last longest - 1 characters of a chunk
+    without being complete yet, so only that tail is carried over to the next
+    chunk and everything before it is final.
+    """
+
+    redactor: Redactor
+
+    _carry: str
+
+    def __init__(self, redactor: Redactor) -> None:
+        self.redactor = redactor
+
+        self._carry = ""
+
+    def feed(self, chunk: str) -> str:
+        pattern = self.redactor._pattern  # skipcq: PYL-W0212
+        if pattern is None:
+            text, self._carry = self._carry + chunk, ""
+            return text
+
+        text = self._carry + chunk
+        # Matches starting before here can't be cut short by the end of the text
+        safe = len(text) - self.redactor._longest + 1  # skipcq: PYL-W0212
+
+        pieces: List[str] = []
+        pos = 0
+        for match in pattern.finditer(text):
+            if match.start() >= safe:
+                break
+
+            pieces.append(text[pos : match.start()])
+            pieces.append(self.redactor.replacement)
+            pos = match.end()
+
+        end = max(pos, safe)
+        pieces.append(text[pos:end])
+        self._carry = text[end:]
+
+        return "".join(pieces)
+
+    def flush(self) -> str:
+        text, self._carry = self._carry, ""
+        return self.redactor.redact(text)
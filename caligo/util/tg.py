@@ -1,7 +1,5 @@
-import io
 import re
-import uuid
-from typing import Any
+from typing import Any, BinaryIO
 
 import bprint
 import pyrogram
@@ -81,14 +79,12 @@ def truncate(text: str) -> str:
 
 
 async def send_as_document(
-    content: str, msg: pyrogram.types.Message, caption: str
+    document: BinaryIO, msg: pyrogram.types.Message, caption: str
 ) -> pyrogram.types.Message:
-    with io.BytesIO(str.encode(content)) as o:
-        o.name = str(uuid.uuid4()).split("-")[0].upper() + ".TXT"
-        return await msg.reply_document(
-            document=o,
-            caption="❯ ```" + caption + "```",
-        )
+    return await msg.reply_document(
+        document=document,
+        caption="❯ ```" + caption + "```",
+    )
 
 
 async def parse_telegram_link(link):